@@ -0,0 +1,912 @@
+/*
+ * Optional C speedups for jsonease.
+ *
+ * make_scanner() builds the Basic tier scanner and make_encoder() the Basic
+ * tier encoder loops.  Both call back into the Python decoder/encoder for
+ * every hook a subclass overrides, so the Advanced and Custom tiers keep
+ * working unchanged.  jsonease falls back to the pure Python classes when
+ * this module is not available.
+ */
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <structmember.h>
+
+#define MEMO_SIZE 4096
+#define MAX_C_DEPTH 1000
+
+#if PY_VERSION_HEX < 0x030C0000
+#define READY(s) PyUnicode_READY(s)
+#else
+#define READY(s) 0
+#endif
+
+/* Scanner ******************************************************************/
+
+typedef struct {
+    PyObject_HEAD
+    PyObject *error;
+    PyObject *string_hook;
+    PyObject *key_hook;
+    PyObject *object_hook;
+    PyObject *array_hook;
+    PyObject *parse_float;
+    PyObject *memo;
+    int intern_keys;
+    Py_ssize_t max_depth;
+} ScannerObject;
+
+typedef struct {
+    PyObject *s;
+    int kind;
+    const void *data;
+    Py_ssize_t len;
+} Text;
+
+#define CHAR(t, i) PyUnicode_READ((t)->kind, (t)->data, (i))
+
+static void
+raise_error(ScannerObject *self, Text *t, Py_ssize_t pos, const char *msg)
+{
+    PyObject *exc = PyObject_CallFunction(self->error, "Onz", t->s, pos, msg);
+    if (exc != NULL) {
+        PyErr_SetObject((PyObject *)Py_TYPE(exc), exc);
+        Py_DECREF(exc);
+    }
+}
+
+static Py_ssize_t
+skip_whitespace(Text *t, Py_ssize_t pos)
+{
+    while (pos < t->len) {
+        Py_UCS4 c = CHAR(t, pos);
+        if (c != ' ' && c != '\t' && c != '\n' && c != '\r')
+            break;
+        pos++;
+    }
+    return pos;
+}
+
+static int
+unexpected_end(ScannerObject *self, Text *t, Py_ssize_t pos)
+{
+    if (pos >= t->len) {
+        raise_error(self, t, t->len, "Incorrect end of json string: ");
+        return 1;
+    }
+    return 0;
+}
+
+static PyObject *
+call_hook(PyObject *hook, Text *t, Py_ssize_t pos, Py_ssize_t *next)
+{
+    PyObject *res = PyObject_CallFunction(hook, "On", t->s, pos);
+    if (res == NULL)
+        return NULL;
+    if (!PyTuple_Check(res) || PyTuple_GET_SIZE(res) != 2) {
+        Py_DECREF(res);
+        PyErr_SetString(PyExc_TypeError, "decoder hooks must return a (value, end) tuple");
+        return NULL;
+    }
+    *next = PyLong_AsSsize_t(PyTuple_GET_ITEM(res, 1));
+    if (*next == -1 && PyErr_Occurred()) {
+        Py_DECREF(res);
+        return NULL;
+    }
+    PyObject *value = PyTuple_GET_ITEM(res, 0);
+    Py_INCREF(value);
+    Py_DECREF(res);
+    return value;
+}
+
+static PyObject *
+call_finish(PyObject *hook, PyObject *obj)
+{
+    if (hook == NULL)
+        return obj;
+    PyObject *res = PyObject_CallFunctionObjArgs(hook, obj, NULL);
+    Py_DECREF(obj);
+    return res;
+}
+
+static int
+hex_value(Text *t, Py_ssize_t pos)
+{
+    int value = 0;
+    if (pos + 4 > t->len)
+        return -1;
+    for (Py_ssize_t i = pos; i < pos + 4; i++) {
+        Py_UCS4 c = CHAR(t, i);
+        value <<= 4;
+        if (c >= '0' && c <= '9')
+            value |= c - '0';
+        else if (c >= 'a' && c <= 'f')
+            value |= c - 'a' + 10;
+        else if (c >= 'A' && c <= 'F')
+            value |= c - 'A' + 10;
+        else
+            return -1;
+    }
+    return value;
+}
+
+static PyObject *
+scan_string(ScannerObject *self, Text *t, Py_ssize_t pos, Py_ssize_t *next)
+{
+    Py_ssize_t end = pos + 1, escapes = 0;
+    while (end < t->len) {
+        Py_UCS4 c = CHAR(t, end);
+        if (c == '"')
+            break;
+        if (c == '\\') {
+            escapes++;
+            end++;
+        }
+        end++;
+    }
+    if (end >= t->len) {
+        raise_error(self, t, pos, "Can not decode json \"string\" string: ");
+        return NULL;
+    }
+    *next = end + 1;
+    if (escapes == 0)
+        return PyUnicode_Substring(t->s, pos + 1, end);
+
+    Py_UCS4 *buf = PyMem_New(Py_UCS4, end - pos);
+    if (buf == NULL)
+        return PyErr_NoMemory();
+    Py_ssize_t n = 0;
+    for (Py_ssize_t i = pos + 1; i < end; i++) {
+        Py_UCS4 c = CHAR(t, i);
+        if (c != '\\') {
+            buf[n++] = c;
+            continue;
+        }
+        c = CHAR(t, ++i);
+        switch (c) {
+        case '"': case '\\': case '/': buf[n++] = c; break;
+        case 'b': buf[n++] = '\b'; break;
+        case 'f': buf[n++] = '\f'; break;
+        case 'n': buf[n++] = '\n'; break;
+        case 'r': buf[n++] = '\r'; break;
+        case 't': buf[n++] = '\t'; break;
+        case 'u': {
+            int code = hex_value(t, i + 1);
+            if (code < 0)
+                goto error;
+            i += 4;
+            if (code >= 0xD800 && code <= 0xDBFF && i + 6 < end &&
+                    CHAR(t, i + 1) == '\\' && CHAR(t, i + 2) == 'u') {
+                int low = hex_value(t, i + 3);
+                if (low >= 0xDC00 && low <= 0xDFFF) {
+                    code = 0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00);
+                    i += 6;
+                }
+            }
+            buf[n++] = (Py_UCS4)code;
+            break;
+        }
+        default:
+            goto error;
+        }
+    }
+    PyObject *res = PyUnicode_FromKindAndData(PyUnicode_4BYTE_KIND, buf, n);
+    PyMem_Free(buf);
+    return res;
+error:
+    PyMem_Free(buf);
+    raise_error(self, t, pos, "Can not decode json \"string\" string: ");
+    return NULL;
+}
+
+static PyObject *
+scan_key(ScannerObject *self, Text *t, Py_ssize_t pos, Py_ssize_t *next)
+{
+    if (self->key_hook != NULL)
+        return call_hook(self->key_hook, t, pos, next);
+    PyObject *key = scan_string(self, t, pos, next);
+    if (key == NULL)
+        return NULL;
+    PyObject *memo = PyDict_GetItemWithError(self->memo, key);
+    if (memo != NULL) {
+        Py_INCREF(memo);
+        Py_DECREF(key);
+        return memo;
+    }
+    if (PyErr_Occurred()) {
+        Py_DECREF(key);
+        return NULL;
+    }
+    if (self->intern_keys)
+        PyUnicode_InternInPlace(&key);
+    if (PyDict_GET_SIZE(self->memo) < MEMO_SIZE && PyDict_SetItem(self->memo, key, key) < 0) {
+        Py_DECREF(key);
+        return NULL;
+    }
+    return key;
+}
+
+static Py_ssize_t
+match_digits(Text *t, Py_ssize_t pos)
+{
+    while (pos < t->len && CHAR(t, pos) >= '0' && CHAR(t, pos) <= '9')
+        pos++;
+    return pos;
+}
+
+static PyObject *
+scan_number(ScannerObject *self, Text *t, Py_ssize_t pos, Py_ssize_t *next)
+{
+    Py_ssize_t end = pos, mark;
+    int is_float = 0;
+    if (end < t->len && CHAR(t, end) == '-')
+        end++;
+    if (end < t->len && CHAR(t, end) == '0')
+        end++;
+    else if (end < t->len && CHAR(t, end) >= '1' && CHAR(t, end) <= '9')
+        end = match_digits(t, end + 1);
+    else {
+        raise_error(self, t, pos, "Can not decode json \"number\" string: ");
+        return NULL;
+    }
+    if (end + 1 < t->len && CHAR(t, end) == '.' && (mark = match_digits(t, end + 1)) > end + 1) {
+        end = mark;
+        is_float = 1;
+    }
+    if (end + 1 < t->len && (CHAR(t, end) == 'e' || CHAR(t, end) == 'E')) {
+        mark = end + 1;
+        if (CHAR(t, mark) == '-' || CHAR(t, mark) == '+')
+            mark++;
+        Py_ssize_t digits = match_digits(t, mark);
+        if (digits > mark) {
+            end = digits;
+            is_float = 1;
+        }
+    }
+    *next = end;
+    PyObject *raw = PyUnicode_Substring(t->s, pos, end);
+    if (raw == NULL)
+        return NULL;
+    PyObject *res;
+    if (!is_float)
+        res = PyLong_FromUnicodeObject(raw, 10);
+    else if (self->parse_float == NULL)
+        res = PyFloat_FromString(raw);
+    else
+        res = PyObject_CallFunctionObjArgs(self->parse_float, raw, NULL);
+    Py_DECREF(raw);
+    return res;
+}
+
+static int
+match_literal(Text *t, Py_ssize_t pos, const char *literal)
+{
+    for (Py_ssize_t i = 0; literal[i]; i++) {
+        if (pos + i >= t->len || CHAR(t, pos + i) != (Py_UCS4)literal[i])
+            return 0;
+    }
+    return 1;
+}
+
+static PyObject *scan_value(ScannerObject *self, Text *t, Py_ssize_t pos, Py_ssize_t *next, Py_ssize_t depth);
+
+static PyObject *
+scan_array(ScannerObject *self, Text *t, Py_ssize_t start, Py_ssize_t *next, Py_ssize_t depth)
+{
+    PyObject *value, *res = PyList_New(0);
+    if (res == NULL)
+        return NULL;
+    Py_ssize_t pos = skip_whitespace(t, start + 1);
+    if (unexpected_end(self, t, pos))
+        goto error;
+    if (CHAR(t, pos) == ']') {
+        /* like the Python tiers, empty arrays skip finish_array */
+        *next = pos + 1;
+        return res;
+    }
+    while (1) {
+        value = scan_value(self, t, pos, &pos, depth + 1);
+        if (value == NULL)
+            goto error;
+        if (PyList_Append(res, value) < 0) {
+            Py_DECREF(value);
+            goto error;
+        }
+        Py_DECREF(value);
+        pos = skip_whitespace(t, pos);
+        if (unexpected_end(self, t, pos))
+            goto error;
+        if (CHAR(t, pos) == ']')
+            break;
+        if (CHAR(t, pos) != ',') {
+            raise_error(self, t, start, "Can not decode json \"array\" string: ");
+            goto error;
+        }
+        pos++;
+    }
+    *next = pos + 1;
+    return call_finish(self->array_hook, res);
+error:
+    Py_DECREF(res);
+    return NULL;
+}
+
+static PyObject *
+scan_object(ScannerObject *self, Text *t, Py_ssize_t start, Py_ssize_t *next, Py_ssize_t depth)
+{
+    PyObject *key, *value, *res = PyDict_New();
+    if (res == NULL)
+        return NULL;
+    Py_ssize_t pos = skip_whitespace(t, start + 1);
+    if (unexpected_end(self, t, pos))
+        goto error;
+    if (CHAR(t, pos) != '}') {
+        while (1) {
+            if (CHAR(t, pos) != '"') {
+                raise_error(self, t, pos, "Can not decode json \"string\" string: ");
+                goto error;
+            }
+            key = scan_key(self, t, pos, &pos);
+            if (key == NULL)
+                goto error;
+            pos = skip_whitespace(t, pos);
+            if (pos >= t->len || CHAR(t, pos) != ':') {
+                Py_DECREF(key);
+                if (!unexpected_end(self, t, pos))
+                    raise_error(self, t, start, "Can not decode json \"object\" string: ");
+                goto error;
+            }
+            value = scan_value(self, t, pos + 1, &pos, depth + 1);
+            if (value == NULL) {
+                Py_DECREF(key);
+                goto error;
+            }
+            int rc = PyDict_SetItem(res, key, value);
+            Py_DECREF(key);
+            Py_DECREF(value);
+            if (rc < 0)
+                goto error;
+            pos = skip_whitespace(t, pos);
+            if (unexpected_end(self, t, pos))
+                goto error;
+            if (CHAR(t, pos) == '}')
+                break;
+            if (CHAR(t, pos) != ',') {
+                raise_error(self, t, start, "Can not decode json \"object\" string: ");
+                goto error;
+            }
+            pos = skip_whitespace(t, pos + 1);
+            if (unexpected_end(self, t, pos))
+                goto error;
+        }
+    }
+    *next = pos + 1;
+    return call_finish(self->object_hook, res);
+error:
+    Py_DECREF(res);
+    return NULL;
+}
+
+static PyObject *
+scan_value(ScannerObject *self, Text *t, Py_ssize_t pos, Py_ssize_t *next, Py_ssize_t depth)
+{
+    pos = skip_whitespace(t, pos);
+    if (unexpected_end(self, t, pos))
+        return NULL;
+    Py_UCS4 c = CHAR(t, pos);
+    switch (c) {
+    case '"':
+        if (self->string_hook != NULL)
+            return call_hook(self->string_hook, t, pos, next);
+        return scan_string(self, t, pos, next);
+    case '[':
+    case '{':
+        if (self->max_depth >= 0 && depth >= self->max_depth) {
+            raise_error(self, t, pos, "Exceeded maximum nesting depth of json string: ");
+            return NULL;
+        }
+        if (depth >= MAX_C_DEPTH) {
+            PyErr_SetString(PyExc_RecursionError, "maximum recursion depth exceeded while decoding json");
+            return NULL;
+        }
+        return c == '[' ? scan_array(self, t, pos, next, depth) : scan_object(self, t, pos, next, depth);
+    case 'n':
+        if (!match_literal(t, pos, "null")) {
+            raise_error(self, t, pos, "Can not decode json \"null\" string: ");
+            return NULL;
+        }
+        *next = pos + 4;
+        Py_RETURN_NONE;
+    case 't':
+    case 'f':
+        if (match_literal(t, pos, "true")) {
+            *next = pos + 4;
+            Py_RETURN_TRUE;
+        }
+        if (match_literal(t, pos, "false")) {
+            *next = pos + 5;
+            Py_RETURN_FALSE;
+        }
+        raise_error(self, t, pos, "Can not decode json \"boolean\" string: ");
+        return NULL;
+    default:
+        if (c == '-' || (c >= '0' && c <= '9'))
+            return scan_number(self, t, pos, next);
+        raise_error(self, t, pos, "Can not decode json string: ");
+        return NULL;
+    }
+}
+
+static PyObject *
+scanner_call(ScannerObject *self, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"s", "pos", NULL};
+    PyObject *s, *value, *res = NULL;
+    Py_ssize_t pos, next = 0;
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "Un:scanner", kwlist, &s, &pos))
+        return NULL;
+    if (READY(s) < 0)
+        return NULL;
+    Text t = {s, PyUnicode_KIND(s), PyUnicode_DATA(s), PyUnicode_GET_LENGTH(s)};
+    if (pos < 0 || pos > t.len) {
+        PyErr_SetString(PyExc_ValueError, "pos out of range");
+        return NULL;
+    }
+    value = scan_value(self, &t, pos, &next, 0);
+    PyDict_Clear(self->memo);
+    if (value != NULL) {
+        res = Py_BuildValue("(Nn)", value, next);
+    }
+    return res;
+}
+
+static PyObject *
+scanner_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"error", "string_hook", "key_hook", "object_hook", "array_hook", "parse_float",
+                             "intern_keys", "max_depth", NULL};
+    PyObject *error, *string_hook, *key_hook, *object_hook, *array_hook, *parse_float;
+    int intern_keys = 0;
+    Py_ssize_t max_depth = -1;
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "OOOOOO|pn:make_scanner", kwlist, &error, &string_hook, &key_hook,
+                                     &object_hook, &array_hook, &parse_float, &intern_keys, &max_depth))
+        return NULL;
+    ScannerObject *self = (ScannerObject *)type->tp_alloc(type, 0);
+    if (self == NULL)
+        return NULL;
+    self->memo = PyDict_New();
+    if (self->memo == NULL) {
+        Py_DECREF(self);
+        return NULL;
+    }
+#define HOOK(name) self->name = name == Py_None ? NULL : (Py_INCREF(name), name)
+    Py_INCREF(error);
+    self->error = error;
+    HOOK(string_hook);
+    HOOK(key_hook);
+    HOOK(object_hook);
+    HOOK(array_hook);
+    HOOK(parse_float);
+#undef HOOK
+    self->intern_keys = intern_keys;
+    self->max_depth = max_depth;
+    return (PyObject *)self;
+}
+
+static int
+scanner_traverse(ScannerObject *self, visitproc visit, void *arg)
+{
+    Py_VISIT(self->error);
+    Py_VISIT(self->string_hook);
+    Py_VISIT(self->key_hook);
+    Py_VISIT(self->object_hook);
+    Py_VISIT(self->array_hook);
+    Py_VISIT(self->parse_float);
+    Py_VISIT(self->memo);
+    return 0;
+}
+
+static int
+scanner_clear(ScannerObject *self)
+{
+    Py_CLEAR(self->error);
+    Py_CLEAR(self->string_hook);
+    Py_CLEAR(self->key_hook);
+    Py_CLEAR(self->object_hook);
+    Py_CLEAR(self->array_hook);
+    Py_CLEAR(self->parse_float);
+    Py_CLEAR(self->memo);
+    return 0;
+}
+
+static void
+scanner_dealloc(ScannerObject *self)
+{
+    PyObject_GC_UnTrack(self);
+    scanner_clear(self);
+    Py_TYPE(self)->tp_free((PyObject *)self);
+}
+
+static PyTypeObject ScannerType = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    .tp_name = "_jsonease_speedups.make_scanner",
+    .tp_doc = "make_scanner(error, string_hook, key_hook, object_hook, array_hook, parse_float, "
+              "intern_keys=False, max_depth=-1)\n\nCallable scanner(s, pos) -> (value, end).",
+    .tp_basicsize = sizeof(ScannerObject),
+    .tp_flags = Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC,
+    .tp_new = scanner_new,
+    .tp_call = (ternaryfunc)scanner_call,
+    .tp_traverse = (traverseproc)scanner_traverse,
+    .tp_clear = (inquiry)scanner_clear,
+    .tp_dealloc = (destructor)scanner_dealloc,
+};
+
+/* Encoder ******************************************************************/
+
+typedef struct {
+    PyObject_HEAD
+    PyObject *encoder;
+    PyObject *dispatch;
+    PyObject *natives;
+    PyObject *item_sep;
+    PyObject *key_sep;
+    PyObject *eol;
+    Py_ssize_t indent;
+} EncoderObject;
+
+static PyObject *
+escape_str(PyObject *s)
+{
+    if (READY(s) < 0)
+        return NULL;
+    int kind = PyUnicode_KIND(s);
+    const void *data = PyUnicode_DATA(s);
+    Py_ssize_t len = PyUnicode_GET_LENGTH(s), extra = 0;
+    Py_UCS4 maxchar = 127;
+    for (Py_ssize_t i = 0; i < len; i++) {
+        Py_UCS4 c = PyUnicode_READ(kind, data, i);
+        if (c == '"' || c == '\\' || c == '\b' || c == '\f' || c == '\n' || c == '\r' || c == '\t')
+            extra += 1;
+        else if (c < 0x20)
+            extra += 5;
+        else if (c > maxchar)
+            maxchar = c;
+    }
+    PyObject *res = PyUnicode_New(len + extra + 2, maxchar);
+    if (res == NULL)
+        return NULL;
+    int rkind = PyUnicode_KIND(res);
+    void *rdata = PyUnicode_DATA(res);
+    Py_ssize_t n = 0;
+    PyUnicode_WRITE(rkind, rdata, n++, '"');
+    for (Py_ssize_t i = 0; i < len; i++) {
+        Py_UCS4 c = PyUnicode_READ(kind, data, i);
+        Py_UCS4 esc = 0;
+        switch (c) {
+        case '"': esc = '"'; break;
+        case '\\': esc = '\\'; break;
+        case '\b': esc = 'b'; break;
+        case '\f': esc = 'f'; break;
+        case '\n': esc = 'n'; break;
+        case '\r': esc = 'r'; break;
+        case '\t': esc = 't'; break;
+        }
+        if (esc) {
+            PyUnicode_WRITE(rkind, rdata, n++, '\\');
+            PyUnicode_WRITE(rkind, rdata, n++, esc);
+        }
+        else if (c < 0x20) {
+            static const char hex[] = "0123456789abcdef";
+            PyUnicode_WRITE(rkind, rdata, n++, '\\');
+            PyUnicode_WRITE(rkind, rdata, n++, 'u');
+            PyUnicode_WRITE(rkind, rdata, n++, '0');
+            PyUnicode_WRITE(rkind, rdata, n++, '0');
+            PyUnicode_WRITE(rkind, rdata, n++, hex[c >> 4]);
+            PyUnicode_WRITE(rkind, rdata, n++, hex[c & 0xf]);
+        }
+        else {
+            PyUnicode_WRITE(rkind, rdata, n++, c);
+        }
+    }
+    PyUnicode_WRITE(rkind, rdata, n++, '"');
+    return res;
+}
+
+static int
+append(PyObject *chunks, PyObject *chunk)
+{
+    if (chunk == NULL)
+        return -1;
+    int rc = PyList_Append(chunks, chunk);
+    Py_DECREF(chunk);
+    return rc;
+}
+
+static int
+append_str(PyObject *chunks, const char *s)
+{
+    return append(chunks, PyUnicode_FromString(s));
+}
+
+static PyObject *
+padded(PyObject *prefix, PyObject *eol, Py_ssize_t width, const char *suffix)
+{
+    /* prefix + eol + ' ' * width + suffix */
+    PyObject *pad = PyUnicode_New(width, 127);
+    if (pad == NULL)
+        return NULL;
+    for (Py_ssize_t i = 0; i < width; i++)
+        PyUnicode_WRITE(PyUnicode_1BYTE_KIND, PyUnicode_DATA(pad), i, ' ');
+    PyObject *tail = PyUnicode_FromString(suffix);
+    PyObject *res = tail == NULL ? NULL : PyUnicode_FromFormat("%U%U%U%U", prefix, eol, pad, tail);
+    Py_DECREF(pad);
+    Py_XDECREF(tail);
+    return res;
+}
+
+static int encode_value(EncoderObject *self, PyObject *chunks, PyObject *obj, Py_ssize_t align);
+
+static int
+encode_fallback(EncoderObject *self, PyObject *chunks, PyObject *obj, Py_ssize_t align)
+{
+    PyObject *res = PyObject_CallMethod(self->encoder, "iterscan", "Oin", obj, 1, align);
+    if (res == NULL)
+        return -1;
+    PyObject *empty = PyUnicode_New(0, 127);
+    PyObject *joined = empty == NULL ? NULL : PyUnicode_Join(empty, res);
+    Py_XDECREF(empty);
+    Py_DECREF(res);
+    return append(chunks, joined);
+}
+
+static int
+encode_key(EncoderObject *self, PyObject *chunks, PyObject *key)
+{
+    if (PyUnicode_CheckExact(key))
+        return append(chunks, escape_str(key));
+    return append(chunks, PyObject_CallMethod(self->encoder, "encode_str", "O", key));
+}
+
+static int
+encode_container(EncoderObject *self, PyObject *chunks, PyObject *obj, Py_ssize_t align)
+{
+    int is_list = PyList_CheckExact(obj);
+    Py_ssize_t size = is_list ? PyList_GET_SIZE(obj) : PyDict_GET_SIZE(obj);
+    if (size == 0)
+        return append_str(chunks, is_list ? "[]" : "{}");
+    Py_ssize_t inner = align + self->indent;
+    PyObject *open = PyUnicode_FromString(is_list ? "[" : "{");
+    PyObject *empty = PyUnicode_New(0, 127);
+    PyObject *start = NULL, *sep = NULL, *end = NULL;
+    int rc = -1;
+    if (open == NULL || empty == NULL)
+        goto done;
+    start = padded(open, self->eol, inner, "");
+    sep = padded(self->item_sep, empty, inner, "");
+    end = padded(empty, self->eol, align, is_list ? "]" : "}");
+    if (start == NULL || sep == NULL || end == NULL)
+        goto done;
+    Py_INCREF(start);
+    if (append(chunks, start) < 0)
+        goto done;
+    if (is_list) {
+        for (Py_ssize_t i = 0; i < PyList_GET_SIZE(obj); i++) {
+            if (i > 0) {
+                Py_INCREF(sep);
+                if (append(chunks, sep) < 0)
+                    goto done;
+            }
+            PyObject *item = PyList_GET_ITEM(obj, i);
+            Py_INCREF(item);
+            int failed = encode_value(self, chunks, item, inner) < 0;
+            Py_DECREF(item);
+            if (failed)
+                goto done;
+        }
+    }
+    else {
+        PyObject *key, *value;
+        Py_ssize_t pos = 0, i = 0;
+        while (PyDict_Next(obj, &pos, &key, &value)) {
+            if (i++ > 0) {
+                Py_INCREF(sep);
+                if (append(chunks, sep) < 0)
+                    goto done;
+            }
+            Py_INCREF(key);
+            Py_INCREF(value);
+            int failed = encode_key(self, chunks, key) < 0 ||
+                         (Py_INCREF(self->key_sep), append(chunks, self->key_sep)) < 0 ||
+                         encode_value(self, chunks, value, inner) < 0;
+            Py_DECREF(key);
+            Py_DECREF(value);
+            if (failed)
+                goto done;
+        }
+    }
+    Py_INCREF(end);
+    rc = append(chunks, end);
+done:
+    Py_XDECREF(open);
+    Py_XDECREF(empty);
+    Py_XDECREF(start);
+    Py_XDECREF(sep);
+    Py_XDECREF(end);
+    return rc;
+}
+
+static int
+encode_value(EncoderObject *self, PyObject *chunks, PyObject *obj, Py_ssize_t align)
+{
+    PyTypeObject *type = Py_TYPE(obj);
+    PyObject *handler = PyDict_GetItemWithError(self->dispatch, (PyObject *)type);
+    if (handler == NULL && PyErr_Occurred())
+        return -1;
+    PyObject *native = PyDict_GetItemWithError(self->natives, (PyObject *)type);
+    if (native == NULL && PyErr_Occurred())
+        return -1;
+    if (handler == NULL || handler != native)
+        return encode_fallback(self, chunks, obj, align);
+    if (obj == Py_None)
+        return append_str(chunks, "null");
+    if (obj == Py_True)
+        return append_str(chunks, "true");
+    if (obj == Py_False)
+        return append_str(chunks, "false");
+    if (PyUnicode_CheckExact(obj))
+        return append(chunks, escape_str(obj));
+    if (PyLong_CheckExact(obj) || PyFloat_CheckExact(obj))
+        return append(chunks, PyObject_Str(obj));
+    if (PyList_CheckExact(obj) || PyDict_CheckExact(obj)) {
+        if (Py_EnterRecursiveCall(" while encoding a JSON object"))
+            return -1;
+        int rc = encode_container(self, chunks, obj, align);
+        Py_LeaveRecursiveCall();
+        return rc;
+    }
+    return encode_fallback(self, chunks, obj, align);
+}
+
+static PyObject *
+encoder_call(EncoderObject *self, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"obj", "align", NULL};
+    PyObject *obj;
+    Py_ssize_t align = 0;
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|n:encoder", kwlist, &obj, &align))
+        return NULL;
+    PyObject *chunks = PyList_New(0);
+    if (chunks == NULL)
+        return NULL;
+    PyObject *res = NULL;
+    if (encode_value(self, chunks, obj, align) == 0) {
+        PyObject *empty = PyUnicode_New(0, 127);
+        if (empty != NULL) {
+            res = PyUnicode_Join(empty, chunks);
+            Py_DECREF(empty);
+        }
+    }
+    Py_DECREF(chunks);
+    return res;
+}
+
+static PyObject *
+encoder_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"encoder", "dispatch", "natives", "indent", "item_sep", "key_sep", "eol", NULL};
+    PyObject *encoder, *dispatch, *natives, *item_sep, *key_sep, *eol;
+    Py_ssize_t indent;
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "OO!O!nUUU:make_encoder", kwlist, &encoder, &PyDict_Type, &dispatch,
+                                     &PyDict_Type, &natives, &indent, &item_sep, &key_sep, &eol))
+        return NULL;
+    EncoderObject *self = (EncoderObject *)type->tp_alloc(type, 0);
+    if (self == NULL)
+        return NULL;
+    Py_INCREF(encoder);
+    Py_INCREF(dispatch);
+    Py_INCREF(natives);
+    Py_INCREF(item_sep);
+    Py_INCREF(key_sep);
+    Py_INCREF(eol);
+    self->encoder = encoder;
+    self->dispatch = dispatch;
+    self->natives = natives;
+    self->item_sep = item_sep;
+    self->key_sep = key_sep;
+    self->eol = eol;
+    self->indent = indent;
+    return (PyObject *)self;
+}
+
+static int
+encoder_traverse(EncoderObject *self, visitproc visit, void *arg)
+{
+    Py_VISIT(self->encoder);
+    Py_VISIT(self->dispatch);
+    Py_VISIT(self->natives);
+    Py_VISIT(self->item_sep);
+    Py_VISIT(self->key_sep);
+    Py_VISIT(self->eol);
+    return 0;
+}
+
+static int
+encoder_clear(EncoderObject *self)
+{
+    Py_CLEAR(self->encoder);
+    Py_CLEAR(self->dispatch);
+    Py_CLEAR(self->natives);
+    Py_CLEAR(self->item_sep);
+    Py_CLEAR(self->key_sep);
+    Py_CLEAR(self->eol);
+    return 0;
+}
+
+static void
+encoder_dealloc(EncoderObject *self)
+{
+    PyObject_GC_UnTrack(self);
+    encoder_clear(self);
+    Py_TYPE(self)->tp_free((PyObject *)self);
+}
+
+static PyTypeObject EncoderType = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    .tp_name = "_jsonease_speedups.make_encoder",
+    .tp_doc = "make_encoder(encoder, dispatch, natives, indent, item_sep, key_sep, eol)\n\n"
+              "Callable encoder(obj, align=0) -> str.",
+    .tp_basicsize = sizeof(EncoderObject),
+    .tp_flags = Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC,
+    .tp_new = encoder_new,
+    .tp_call = (ternaryfunc)encoder_call,
+    .tp_traverse = (traverseproc)encoder_traverse,
+    .tp_clear = (inquiry)encoder_clear,
+    .tp_dealloc = (destructor)encoder_dealloc,
+};
+
+/* Module *******************************************************************/
+
+static PyObject *
+py_encode_str(PyObject *module, PyObject *s)
+{
+    if (!PyUnicode_Check(s)) {
+        PyErr_Format(PyExc_TypeError, "expected str, got %.100s", Py_TYPE(s)->tp_name);
+        return NULL;
+    }
+    return escape_str(s);
+}
+
+static PyMethodDef speedups_methods[] = {
+    {"encode_str", (PyCFunction)py_encode_str, METH_O, "encode_str(s) -> quoted and escaped json string"},
+    {NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef speedups_module = {
+    PyModuleDef_HEAD_INIT,
+    "_jsonease_speedups",
+    "C speedups for the jsonease Basic tier scanner and encoder.",
+    -1,
+    speedups_methods,
+};
+
+PyMODINIT_FUNC
+PyInit__jsonease_speedups(void)
+{
+    if (PyType_Ready(&ScannerType) < 0 || PyType_Ready(&EncoderType) < 0)
+        return NULL;
+    PyObject *m = PyModule_Create(&speedups_module);
+    if (m == NULL)
+        return NULL;
+    Py_INCREF(&ScannerType);
+    if (PyModule_AddObject(m, "make_scanner", (PyObject *)&ScannerType) < 0) {
+        Py_DECREF(&ScannerType);
+        Py_DECREF(m);
+        return NULL;
+    }
+    Py_INCREF(&EncoderType);
+    if (PyModule_AddObject(m, "make_encoder", (PyObject *)&EncoderType) < 0) {
+        Py_DECREF(&EncoderType);
+        Py_DECREF(m);
+        return NULL;
+    }
+    return m;
+}
@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import gc
+import io
+import sys
+import json
+import time
+import uuid
+import random
+import timeit
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from datetime import datetime, date, timezone, timedelta
+from typing import List, Dict, Any, Callable, Tuple
+
+import jsonease as sj
+
+
+# Corpora #####################################################################
+###############################################################################
+class Node(object):
+    def __init__(self, name: str, weight: float, children: list):
+        self.name = name
+        self.weight = weight
+        self.active = True
+        self.children = children
+
+
+def deep_corpus(rnd: random.Random, size: int) -> Any:
+    obj = None
+    for i in range(min(size, 150)):
+        obj = [i, {'level': i, 'next': obj}] if i % 2 else {'items': [obj, None, True], 'depth': i}
+    return [obj for _ in range(max(1, size // 150))]
+
+
+def wide_corpus(rnd: random.Random, size: int) -> Any:
+    return {'field_%d' % i: rnd.choice([i, -i * 0.5, 'value %d' % i, None, True, False]) for i in range(size)}
+
+
+def string_corpus(rnd: random.Random, size: int) -> Any:
+    words = ['alpha', 'beta', 'gamma', 'delta', 'café', 'naïve', 'quote"d', 'back\\slash', 'new\nline',
+             '漢字', 'tab\tbed', 'emoji \U0001f600']
+    return [' '.join(rnd.choice(words) for _ in range(rnd.randint(1, 12))) for _ in range(size)]
+
+
+def number_corpus(rnd: random.Random, size: int) -> Any:
+    return [[rnd.randint(-10 ** 9, 10 ** 9), rnd.uniform(-1e6, 1e6), rnd.random(), rnd.randint(0, 255)]
+            for _ in range(size // 4 or 1)]
+
+
+def datetime_corpus(rnd: random.Random, size: int) -> Any:
+    base = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    return [{'id': uuid.UUID(int=rnd.getrandbits(128), version=4), 'at': base + timedelta(seconds=rnd.randint(0, 10 ** 8)),
+             'day': date(2000 + i % 30, i % 12 + 1, i % 28 + 1)} for i in range(size // 3 or 1)]
+
+
+def object_corpus(rnd: random.Random, size: int) -> Any:
+    nodes = [Node('leaf %d' % i, rnd.random(), []) for i in range(size // 4 or 1)]
+    while len(nodes) > 1:
+        nodes = [Node('node %d' % i, rnd.random(), nodes[i: i + 4]) for i in range(0, len(nodes), 4)]
+    return nodes[0]
+
+
+CORPORA = {'deep': deep_corpus, 'wide': wide_corpus, 'strings': string_corpus, 'numbers': number_corpus,
+           'datetimes': datetime_corpus, 'objects': object_corpus}
+PLAIN = ('deep', 'wide', 'strings', 'numbers')
+
+
+# Cases #######################################################################
+###############################################################################
+def cases(name: str, obj: Any, directory: str) -> List[Tuple[str, Callable[[], Any], int]]:
+    text = sj.dumps(obj)
+    data = text.encode(sj.JSON_ENCODING)
+    size = len(data)
+    pretty = sj.dumps(obj, indent=4)
+    root = json.loads(text)
+    first = next(iter(root)) if isinstance(root, dict) else 0
+    records = obj if isinstance(obj, list) else [obj]
+    lines = io.StringIO()
+    sj.dump_lines(records, lines)
+    lines = lines.getvalue()
+    path = '%s/%s.json' % (directory, name)
+    with open(path, 'wb') as fp:
+        fp.write(data)
+    output = '%s/%s.out.json' % (directory, name)
+
+    def dump_file():
+        with open(output, 'w', encoding=sj.JSON_ENCODING) as fp:
+            sj.dump(obj, fp)
+
+    def load_file():
+        with open(path, encoding=sj.JSON_ENCODING) as fp:
+            return sj.load(fp)
+
+    def lazy_file():
+        with sj.load_lazy(path) as lazy:
+            return lazy[first]
+    result = [
+        ('dumps BasicEncoder', lambda: sj.dumps(obj, cls=sj.BasicEncoder), size),
+        ('dumps AdvancedEncoder', lambda: sj.dumps(obj, cls=sj.AdvancedEncoder), size),
+        ('dumps CustomEncoder', lambda: sj.dumps(obj), size),
+        ('dumps indent=4', lambda: sj.dumps(obj, indent=4), len(pretty)),
+        ('dump BasicEncoder', lambda: sj.dump(obj, io.StringIO(), cls=sj.BasicEncoder), size),
+        ('dump CustomEncoder', lambda: sj.dump(obj, io.StringIO()), size),
+        ('loads BasicDecoder', lambda: sj.loads(text, cls=sj.BasicDecoder), size),
+        ('loads StackDecoder', lambda: sj.loads(text, cls=sj.StackDecoder), size),
+        ('loads TokenDecoder', lambda: sj.loads(text, cls=sj.TokenDecoder), size),
+        ('loads BytesDecoder', lambda: sj.loads(data, cls=sj.BytesDecoder), size),
+        ('loads AdvancedDecoder', lambda: sj.loads(text, cls=sj.AdvancedDecoder), size),
+        ('loads CustomDecoder', lambda: sj.loads(text), size),
+        ('formats', lambda: sj.formats(text), size),
+        ('minify', lambda: sj.minify(pretty), len(pretty)),
+        ('reformat', lambda: sj.reformat(text, io.StringIO()), size),
+        ('iterparse', lambda: sum(1 for _ in sj.iterparse(data)), size),
+        ('lazy first member', lambda: sj.LazyDocument(data).root()[first], size),
+        ('dump file', dump_file, size),
+        ('load file', load_file, size),
+        ('load_lazy path first member', lazy_file, size),
+        ('dump_lines', lambda: sj.dump_lines(records, io.StringIO()), len(lines)),
+        ('load_lines', lambda: sum(1 for _ in sj.load_lines(io.StringIO(lines))), len(lines)),
+    ]
+    if name in PLAIN:
+        result.append(('stdlib json.dumps', lambda: json.dumps(obj), size))
+    else:
+        result = [case for case in result if case[0] not in ('dumps BasicEncoder', 'dump BasicEncoder')]
+        if name == 'objects':
+            result = [case for case in result if case[0] != 'dumps AdvancedEncoder']
+        result.append(('stdlib json.dumps', lambda: json.dumps(obj, default=lambda o: getattr(o, '__dict__', str(o))),
+                       size))
+    result.append(('stdlib json.loads', lambda: json.loads(text), size))
+    return result
+
+
+def measure(func: Callable[[], Any], size: int, repeat: int, min_time: float) -> Dict[str, float]:
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    while elapsed < min_time:
+        number *= 2
+        elapsed = timer.timeit(number)
+    best = min([elapsed] + timer.repeat(repeat - 1, number)) / number if repeat > 1 else elapsed / number
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'ops': 1 / best, 'mbps': size / best / 1e6, 'seconds': best, 'peak': peak, 'bytes': size}
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    rnd = random.Random(args.seed)
+    results = dict()
+    with tempfile.TemporaryDirectory() as directory:
+        for name, build in CORPORA.items():
+            if args.corpus and name not in args.corpus:
+                continue
+            obj = build(rnd, args.size)
+            for case, func, size in cases(name, obj, directory):
+                if args.filter and args.filter not in case:
+                    continue
+                key = '%s: %s' % (name, case)
+                try:
+                    results[key] = measure(func, size, args.repeat, args.min_time)
+                except (sj.JsoneaseError, RecursionError, TypeError, ValueError) as e:
+                    results[key] = {'error': '%s: %s' % (type(e).__name__, e)}
+                report(key, results[key], args.baseline.get(key) if args.baseline else None)
+    return results
+
+
+def report(key: str, result: Dict[str, Any], baseline: Dict[str, Any]=None):
+    if 'error' in result:
+        print('%-44s %s' % (key, result['error'][:60]))
+        return
+    line = '%-44s %12.1f ops/s %9.2f MB/s %10.1f KiB peak' % (key, result['ops'], result['mbps'], result['peak'] / 1024)
+    if baseline and 'ops' in baseline:
+        line += '  %+7.1f%%' % ((result['ops'] / baseline['ops'] - 1) * 100)
+    print(line)
+
+
+def main(argv: List[str]=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Benchmark jsonease against stdlib json.')
+    parser.add_argument('--size', type=int, default=2000, help='approximate number of records per corpus')
+    parser.add_argument('--corpus', action='append', choices=sorted(CORPORA), help='corpus to run, may repeat')
+    parser.add_argument('--filter', help='only run cases whose name contains this text')
+    parser.add_argument('--repeat', type=int, default=3, help='timing repetitions, best one is kept')
+    parser.add_argument('--min-time', type=float, default=0.2, help='minimum seconds per timing repetition')
+    parser.add_argument('--seed', type=int, default=2017, help='random seed for the corpora')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--compare', help='JSON results of a previous run to compare ops/s with')
+    args = parser.parse_args(argv)
+    args.baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as fp:
+            args.baseline = json.load(fp)['results']
+    started = time.time()
+    results = run(args)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fp:
+            json.dump({'version': sj.__version__, 'python': sys.version, 'platform': platform.platform(),
+                       'started': started, 'size': args.size, 'seed': args.seed, 'results': results}, fp, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,47 @@
 #!/usr/bin/env python
 # coding: utf-8
 
+import os
 import re
+import sys
+import json
 import uuid
+import mmap
+import codecs
+import asyncio
+import threading
+import bisect
+import pickle
+import weakref
 import inspect
+from decimal import Decimal
+from array import array
 from io import StringIO
+from time import perf_counter
 from datetime import date, time, datetime, timezone, timedelta
-from collections import abc
-from typing import List, Dict, Any, TextIO, Type, Union, Tuple, Iterable, Mapping
+from itertools import islice
+from collections import abc, deque, OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, BrokenExecutor
+from typing import List, Dict, Any, TextIO, Type, Union, Tuple, Iterable, Iterator, Mapping, Callable, TypeVar
+from typing import get_type_hints
+
+try:
+    import dataclasses
+except ImportError:
+    dataclasses = None
+
+try:
+    from types import UnionType
+except ImportError:
+    UnionType = None
+
+try:
+    import _jsonease_speedups
+except ImportError:
+    _jsonease_speedups = None
+
+if os.environ.get('JSONEASE_NO_SPEEDUPS'):
+    _jsonease_speedups = None
 
 """
     JSON tools for format, encode and decode, inspired by simplejson.
@@ -32,7 +66,7 @@ from typing import List, Dict, Any, TextIO, Type, Union, Tuple, Iterable, Mappin
 """
 
 
-__all__ = ['dump', 'dumps', 'load', 'loads', 'Encoder', 'Decoder', 'Formatter']
+__all__ = ['dump', 'dumps', 'load', 'loads', 'load_lazy', 'load_lines', 'dump_lines', 'async_load', 'async_dump', 'register', 'unregister', 'invalidate', 'instrument', 'minify', 'iterformat', 'reformat', 'iterparse', 'iter_items', 'Encoder', 'Decoder', 'Formatter']
 
 __author__ = ['Yifan Wang <yifan_wang@silanis.com>']
 __copyright__ = "Copyright (C) 2017, Yifan WANG"
@@ -46,20 +80,23 @@ __status__ = "Internal"
 ###############################################################################
 JSON_ENCODING = 'utf-8'
 RE_FLAGS = re.MULTILINE | re.DOTALL
+INSTANCE_CACHE_SIZE = 64
+_POOL_ERRORS = (pickle.PicklingError, AttributeError, TypeError, BrokenExecutor)
 
 
 # Errors ######################################################################
 ###############################################################################
 class JsoneaseError(Exception):
     @staticmethod
-    def linecol(s: str, pos: int):
-        line = s.count('\n', 0, pos) + 1
-        col = pos + 1 if line == 1 else pos - s.rindex('\n', 0, pos)
+    def linecol(s: str, pos: int, origin: Tuple[int, int]=(1, 1)):
+        line = s.count('\n', 0, pos) + origin[0]
+        col = pos + origin[1] if line == origin[0] else pos - s.rindex('\n', 0, pos)
         return str(line), str(col)
 
 
 class JsoneaseEncodeError(JsoneaseError):
     def __init__(self, obj: Any, msg: str='Can not encode python object: '):
+        super(JsoneaseEncodeError, self).__init__(obj, msg)
         self.obj = obj
         self.msg = msg
 
@@ -68,18 +105,21 @@ class JsoneaseEncodeError(JsoneaseError):
 
 
 class JsoneaseDecodeError(JsoneaseError):
-    def __init__(self, s: str, pos: int, msg: str='Can not decode json string: '):
+    def __init__(self, s: str, pos: int, msg: str='Can not decode json string: ', origin: Tuple[int, int]=(1, 1)):
+        super(JsoneaseDecodeError, self).__init__(s, pos, msg, origin)
         self.s = s
         self.pos = pos
         self.msg = msg
+        self.origin = origin
 
     def __str__(self):
-        line, col = self.linecol(self.s, self.pos)
+        line, col = self.linecol(self.s, self.pos, self.origin)
         return ''.join((self.msg, line, ' : ', col))
 
 
 class JsoneaseCastError(JsoneaseError):
     def __init__(self, org: Any, tgt: Any, msg: str='Can not cast python object: '):
+        super(JsoneaseCastError, self).__init__(org, tgt, msg)
         self.org = org
         self.tgt = tgt
         self.msg = msg
@@ -89,16 +129,22 @@ class JsoneaseCastError(JsoneaseError):
 
 
 class JsoneaseFormatError(JsoneaseError):
-    def __init__(self, s: str, pos: int, msg: str='Can not format json string: '):
+    def __init__(self, s: str, pos: int, msg: str='Can not format json string: ', origin: Tuple[int, int]=(1, 1)):
+        super(JsoneaseFormatError, self).__init__(s, pos, msg, origin)
         self.s = s
         self.pos = pos
         self.msg = msg
+        self.origin = origin
 
     def __str__(self):
-        line, col = self.linecol(self.s, self.pos)
+        line, col = self.linecol(self.s, self.pos, self.origin)
         return ''.join((self.msg, line, ' : ', col))
 
 
+class _Unaccelerated(Exception):
+    pass
+
+
 # Encoders ####################################################################
 ###############################################################################
 class Encoder:
@@ -110,105 +156,309 @@ class Encoder:
     def encode(self, obj):
         raise NotImplementedError
 
+    def iterencode(self, obj):
+        raise NotImplementedError
+
 
 class BasicEncoder(Encoder):
     BACKSLASH = {'"': '\\"', '\\': '\\\\', '\b': '\\b', '\f': '\\f', '\n': '\\n', '\r': '\\r', '\t': '\\t'}
     escape_re = re.compile(r'[\x00-\x1f\\"\b\f\n\r\t]')
     ITEM_SEPARATOR = ', '
     KEY_SEPARATOR = ': '
-
-    def __init__(self, encoding: str):
+    HANDLERS = {type(None): 'iter_null', bool: 'iter_bool', int: 'iter_number', float: 'iter_number',
+                str: 'iter_str', list: 'iter_list', dict: 'iter_dict'}
+    SPEEDUP_METHODS = ('iterscan', 'iter_null', 'iter_bool', 'iter_number', 'iter_str', 'encode_str', 'escape',
+                       'iter_list', 'iter_dict')
+    RAW_NONCE = uuid.uuid4().hex
+    raw_re = re.compile(r'"\\u0000%s:(\d+)\\u0000"' % RAW_NONCE)
+    registry = dict()
+    tables_version = 0
+    c_encoder = None
+    json_encoder = None
+    json_version = None
+    json_scalars = frozenset()
+    json_containers = frozenset()
+
+    def __init__(self, encoding: str, indent: int=None, item_sep: str=None, key_sep: str=None, eol: str=None,
+                 accelerated: bool=False):
         super(BasicEncoder, self).__init__(encoding)
+        self.handlers, self.dispatch = self.dispatch_tables()
+        self.accelerated = accelerated
+        if indent is None:
+            self.indent = 0
+            self.item_sep = self.ITEM_SEPARATOR if item_sep is None else item_sep
+            self.key_sep = self.KEY_SEPARATOR if key_sep is None else key_sep
+            self.eol = '' if eol is None else eol
+        else:
+            self.indent = indent
+            self.item_sep = ',\r\n' if item_sep is None else item_sep
+            self.key_sep = ': ' if key_sep is None else key_sep
+            self.eol = '\r\n' if eol is None else eol
+
+    @classmethod
+    def register(cls, clazz: type, func: Callable[[Any], Any]):
+        if 'registry' not in cls.__dict__:
+            cls.registry = dict()
+        cls.registry[clazz] = func
+        cls.refresh_tables()
+
+    @classmethod
+    def unregister(cls, clazz: type):
+        if cls.__dict__.get('registry', {}).pop(clazz, None) is not None:
+            cls.refresh_tables()
+
+    @classmethod
+    def refresh_tables(cls):
+        BasicEncoder.tables_version += 1
+        classes = [cls]
+        while classes:
+            sub = classes.pop()
+            classes.extend(sub.__subclasses__())
+            tables = sub.__dict__.get('_tables')
+            if tables is not None:
+                handlers, dispatch = tables
+                handlers.clear()
+                handlers.update(sub.build_handlers())
+                dispatch.clear()
+                dispatch.update(handlers)
+
+    @classmethod
+    def dispatch_tables(cls) -> Tuple[Dict[type, Callable], Dict[type, Callable]]:
+        tables = cls.__dict__.get('_tables')
+        if tables is None:
+            handlers = cls.build_handlers()
+            tables = cls._tables = handlers, dict(handlers)
+        return tables
+
+    @classmethod
+    def build_handlers(cls) -> Dict[type, Callable]:
+        handlers = dict()
+        for base in reversed(cls.__mro__):
+            for clazz, name in base.__dict__.get('HANDLERS', {}).items():
+                handlers[clazz] = getattr(cls, name)
+        for base in reversed(cls.__mro__):
+            for clazz, func in base.__dict__.get('registry', {}).items():
+                handlers[clazz] = cls.registered(func)
+        return handlers
+
+    @staticmethod
+    def registered(func: Callable[[Any], Any]) -> Callable:
+        def handler(self, obj, align=0):
+            return self.iterscan(func(obj), True, align)
+        return handler
+
+    def invalidate(self, clazz: type=None):
+        if clazz is None:
+            for tp in list(self.dispatch):
+                if tp not in self.handlers:
+                    self.dispatch.pop(tp, None)
+        elif clazz not in self.handlers:
+            self.dispatch.pop(clazz, None)
+
+    def resolve(self, clazz: type) -> Callable:
+        for base in clazz.__mro__:
+            handler = self.handlers.get(base)
+            if handler is not None:
+                return handler
+
+    def make_c_encoder(self) -> Any:
+        cls = type(self)
+        if _jsonease_speedups is None or any(getattr(cls, name) is not getattr(BasicEncoder, name)
+                                             for name in self.SPEEDUP_METHODS):
+            return False
+        natives = {clazz: getattr(BasicEncoder, name) for clazz, name in BasicEncoder.HANDLERS.items()}
+        return _jsonease_speedups.make_encoder(self, self.dispatch, natives, self.indent, self.item_sep,
+                                               self.key_sep, self.eol)
+
+    def make_json_encoder(self) -> Any:
+        cls = type(self)
+        if not self.accelerated or self.indent or self.eol or any(getattr(cls, name) is not getattr(BasicEncoder, name)
+                                                                  for name in self.SPEEDUP_METHODS):
+            return False
+        natives = frozenset(clazz for clazz, name in BasicEncoder.HANDLERS.items()
+                            if self.handlers.get(clazz) is getattr(BasicEncoder, name))
+        self.json_scalars = natives - {list, dict}
+        self.json_containers = natives & {list, dict}
+        return json.JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(self.item_sep, self.key_sep))
+
+    def encode_plain(self, obj: Any) -> Union[str, None]:
+        json_encoder = self.json_encoder
+        if json_encoder is None or self.json_version not in (None, BasicEncoder.tables_version):
+            json_encoder = self.json_encoder = self.make_json_encoder()
+            self.json_version = BasicEncoder.tables_version
+        if not json_encoder:
+            return None
+        c_encoder = self.c_encoder
+        if c_encoder is None:
+            c_encoder = self.c_encoder = self.make_c_encoder()
+        if c_encoder:
+            return c_encoder(obj)
+        raws = []
+        try:
+            text = json_encoder.encode(self.plain_value(obj, raws))
+        except ValueError:
+            return None
+        return self.raw_re.sub(lambda m: raws[int(m.group(1))], text) if raws else text
+
+    def plain_value(self, obj: Any, raws: List[str]) -> Any:
+        tp = type(obj)
+        if tp in self.json_scalars:
+            return obj
+        elif tp in self.json_containers:
+            scalars = self.json_scalars
+            plain_value = self.plain_value
+            copy = None
+            if tp is list:
+                for i, item in enumerate(obj):
+                    value = item if type(item) in scalars else plain_value(item, raws)
+                    if copy is not None:
+                        copy.append(value)
+                    elif value is not item:
+                        copy = obj[:i]
+                        copy.append(value)
+                return obj if copy is None else copy
+            for i, (key, item) in enumerate(obj.items()):
+                if type(key) is not str:
+                    break
+                value = item if type(item) in scalars else plain_value(item, raws)
+                if copy is not None:
+                    copy[key] = value
+                elif value is not item:
+                    copy = dict(islice(obj.items(), i))
+                    copy[key] = value
+            else:
+                return obj if copy is None else copy
+        raws.append(''.join(self.iterscan(obj)))
+        return '\x00%s:%d\x00' % (self.RAW_NONCE, len(raws) - 1)
 
-    def encode(self, obj: Any) -> str:
+    def encode(self, obj: Any, align: int=0) -> str:
+        if isinstance(obj, bytes):
+            obj = obj.decode(self.encoding)
+        if self.accelerated and not align:
+            plain = self.encode_plain(obj)
+            if plain is not None:
+                return plain
+        c_encoder = self.c_encoder
+        if c_encoder is None:
+            c_encoder = self.c_encoder = self.make_c_encoder()
+        if c_encoder:
+            return c_encoder(obj, align)
+        return ''.join(self.iterscan(obj, True, align))
+
+    def iterencode(self, obj: Any) -> Iterator[str]:
         if isinstance(obj, bytes):
             obj = obj.decode(self.encoding)
-        return self.scan(obj)
+        return iter(self.iterscan(obj))
 
     def scan(self, obj: Any, throwable: bool=True) -> str:
-        if obj is None:
-            return 'null'
-        elif isinstance(obj, bool):
-            return 'true' if obj else 'false'
-        elif isinstance(obj, (int, float)):
-            return str(obj)
-        elif isinstance(obj, str):
-            return self.encode_str(obj)
-        elif isinstance(obj, list):
-            return self.encode_list(obj)
-        elif isinstance(obj, dict):
-            return self.encode_dict(obj)
-        elif throwable:
+        chunks = self.iterscan(obj, throwable)
+        if chunks is not None:
+            return ''.join(chunks)
+
+    def iterscan(self, obj: Any, throwable: bool=True, align: int=0) -> Iterable[str]:
+        handler = self.dispatch.get(type(obj))
+        if handler is None:
+            handler = self.dispatch.setdefault(type(obj), self.resolve(type(obj)) or BasicEncoder.iter_unsupported)
+        chunks = handler(self, obj, align)
+        if chunks is None and throwable:
             raise JsoneaseEncodeError(obj)
+        return chunks
+
+    def iter_unsupported(self, obj: Any, align: int=0) -> None:
+        return None
+
+    def iter_null(self, obj: None, align: int=0) -> Iterable[str]:
+        return ('null',)
+
+    def iter_bool(self, obj: bool, align: int=0) -> Iterable[str]:
+        return ('true' if obj else 'false',)
+
+    def iter_number(self, obj: Union[int, float], align: int=0) -> Iterable[str]:
+        return (str(obj),)
+
+    def iter_str(self, obj: str, align: int=0) -> Iterable[str]:
+        return (self.encode_str(obj),)
 
     def encode_str(self, obj: str) -> str:
-        _obj = StringIO()
-        _obj.write('"')
-        _obj.write(self.escape_re.sub(lambda m: self.BACKSLASH[m.group(0)], obj))
-        _obj.write('"')
-        return _obj.getvalue()
+        return ''.join(('"', self.escape_re.sub(self.escape, obj), '"'))
+
+    def escape(self, m: Any) -> str:
+        c = m.group(0)
+        return self.BACKSLASH.get(c) or '\\u%04x' % ord(c)
 
     def encode_list(self, obj: Iterable) -> str:
+        return ''.join(self.iter_list(obj))
+
+    def iter_list(self, obj: Iterable, align: int=0) -> Iterator[str]:
         if not obj:
-            return '[]'
-        _obj = StringIO()
-        _obj.write('[')
+            yield '[]'
+            return
+        inner = align + self.indent
+        pad = ' ' * inner
+        yield '[' + self.eol + pad
         it = iter(obj)
-        _obj.write(self.scan(next(it)))
+        yield from self.iterscan(next(it), True, inner)
+        sep = self.item_sep + pad
         for item in it:
-            _obj.write(self.ITEM_SEPARATOR)
-            _obj.write(self.scan(item))
-        _obj.write(']')
-        return _obj.getvalue()
+            yield sep
+            yield from self.iterscan(item, True, inner)
+        yield self.eol + ' ' * align + ']'
 
     def encode_dict(self, obj: Mapping) -> str:
+        return ''.join(self.iter_dict(obj))
+
+    def iter_dict(self, obj: Mapping, align: int=0) -> Iterator[str]:
         if not obj:
-            return '{}'
-        _obj = StringIO()
-        _obj.write('{')
+            yield '{}'
+            return
+        inner = align + self.indent
+        pad = ' ' * inner
+        key_sep = self.key_sep
         it = iter(obj)
         key = next(it)
-        _obj.write(self.encode_str(key))
-        _obj.write(self.KEY_SEPARATOR)
-        _obj.write(self.scan(obj[key]))
+        yield '{' + self.eol + pad + self.encode_str(key) + key_sep
+        yield from self.iterscan(obj[key], True, inner)
+        sep = self.item_sep + pad
         for key in it:
-            _obj.write(self.ITEM_SEPARATOR)
-            _obj.write(self.encode_str(key))
-            _obj.write(self.KEY_SEPARATOR)
-            _obj.write(self.scan(obj[key]))
-        _obj.write('}')
-        return _obj.getvalue()
+            yield sep + self.encode_str(key) + key_sep
+            yield from self.iterscan(obj[key], True, inner)
+        yield self.eol + ' ' * align + '}'
 
 
 _default_encoder = BasicEncoder(JSON_ENCODING)
 
 
 class AdvancedEncoder(BasicEncoder):
-    def __init__(self, encoding: str=JSON_ENCODING):
-        super(AdvancedEncoder, self).__init__(encoding)
+    HANDLERS = {uuid.UUID: 'iter_uuid', complex: 'iter_complex', slice: 'iter_slice', date: 'iter_datetime',
+                time: 'iter_datetime', Decimal: 'iter_decimal'}
 
-    def scan(self, obj: Any, throwable: bool=True) -> str:
-        s = super(AdvancedEncoder, self).scan(obj, False)
-        if s is not None:
-            return s
-        elif isinstance(obj, uuid.UUID):
-            return ''.join(('"', str(obj), '"'))
-        elif isinstance(obj, complex):
-            return ''.join(('{"real": ', str(obj.real),
-                            ', "imag": ', str(obj.imag), '}'))
-        elif isinstance(obj, slice):
-            return ''.join(('{"start": ', str(obj.start),
-                            ', "stop": ', str(obj.stop),
-                            ', "step": ', str(obj.step), '}'))
-        elif isinstance(obj, (date, time)):
-            return self.encode_datetime(obj)
-        elif isinstance(obj, abc.Iterable):
-            if isinstance(obj, (abc.Sequence, abc.Set)):
-                return self.encode_list(obj)
-            elif isinstance(obj, abc.Mapping):
-                return self.encode_dict(obj)
-        elif throwable:
-            raise JsoneaseEncodeError(obj)
+    def __init__(self, encoding: str=JSON_ENCODING, indent: int=None, item_sep: str=None, key_sep: str=None,
+                 eol: str=None, accelerated: bool=False):
+        super(AdvancedEncoder, self).__init__(encoding, indent, item_sep, key_sep, eol, accelerated)
+
+    def resolve(self, clazz: type) -> Callable:
+        handler = super(AdvancedEncoder, self).resolve(clazz)
+        if handler is None and issubclass(clazz, abc.Iterable):
+            if issubclass(clazz, (abc.Sequence, abc.Set)):
+                handler = type(self).iter_list
+            elif issubclass(clazz, abc.Mapping):
+                handler = type(self).iter_dict
+        return handler
+
+    def iter_uuid(self, obj: uuid.UUID, align: int=0) -> Iterable[str]:
+        return ('"', str(obj), '"')
+
+    def iter_decimal(self, obj: Decimal, align: int=0) -> Iterable[str]:
+        return (str(obj),) if obj.is_finite() else None
+
+    def iter_complex(self, obj: complex, align: int=0) -> Iterable[str]:
+        return self.iter_dict({'real': obj.real, 'imag': obj.imag}, align)
+
+    def iter_slice(self, obj: slice, align: int=0) -> Iterable[str]:
+        return self.iter_dict({'start': obj.start, 'stop': obj.stop, 'step': obj.step}, align)
+
+    def iter_datetime(self, obj: Union[date, time], align: int=0) -> Iterable[str]:
+        return (self.encode_datetime(obj),)
 
     def encode_datetime(self, obj: Union[date, time]) -> str:
         if isinstance(obj, datetime):
@@ -222,18 +472,19 @@ class AdvancedEncoder(BasicEncoder):
 
 
 class CustomEncoder(AdvancedEncoder):
+    RESERVED = frozenset(dir(type('', (), {}))) | {'__slots__', '__slotnames__'}
 
-    def __init__(self, encoding: str=JSON_ENCODING):
-        super(CustomEncoder, self).__init__(encoding)
+    def __init__(self, encoding: str=JSON_ENCODING, indent: int=None, item_sep: str=None, key_sep: str=None,
+                 eol: str=None, accelerated: bool=False):
+        super(CustomEncoder, self).__init__(encoding, indent, item_sep, key_sep, eol, accelerated)
+        self.plans = weakref.WeakKeyDictionary()
+        self.routines = weakref.WeakKeyDictionary()
 
-    def scan(self, obj: Any, throwable: bool=True) -> str:
-        s = super(CustomEncoder, self).scan(obj, False)
-        if s is not None:
-            return s
-        elif self.is_object(obj):
-            return self.encode_object(obj)
-        elif throwable:
-            raise JsoneaseEncodeError(obj)
+    def resolve(self, clazz: type) -> Callable:
+        handler = super(CustomEncoder, self).resolve(clazz)
+        if handler is None:
+            handler = type(self).iter_object
+        return handler
 
     def is_object(self, obj) -> bool:
         return not (inspect.ismodule(obj) or inspect.isclass(obj) or inspect.isroutine(obj) or inspect.iscode(obj)
@@ -247,31 +498,87 @@ class CustomEncoder(AdvancedEncoder):
             return False
         return inspect.isroutine(getattr(obj, func))
 
+    def is_routine(self, obj: Any) -> bool:
+        routine = self.routines.get(type(obj))
+        if routine is None:
+            routine = self.routines[type(obj)] = inspect.isroutine(obj)
+        return routine
+
+    def invalidate(self, clazz: type=None):
+        if clazz is None:
+            self.plans.clear()
+        else:
+            self.plans.pop(clazz, None)
+        super(CustomEncoder, self).invalidate(clazz)
+
+    def plan(self, obj: Any) -> Tuple[str, Tuple[str, ...], Tuple[str, ...]]:
+        clazz = type(obj)
+        plan = self.plans.get(clazz)
+        if plan is None:
+            plan = self.plans[clazz] = self.compile_plan(obj)
+        return plan
+
+    def compile_plan(self, obj: Any) -> Tuple[str, Tuple[str, ...], Tuple[str, ...]]:
+        clazz = type(obj)
+        if not self.is_object(obj):
+            return 'none', (), ()
+        if self.has_func(clazz, '__getstate__') and clazz.__getstate__ is not getattr(object, '__getstate__', None):
+            return 'state', (), ()
+        if self.has_func(clazz, '__json__'):
+            return 'json', (), ()
+        defaults = list()
+        slots = list()
+        for base in inspect.getmro(clazz):
+            names = base.__dict__.get('__slots__', ())
+            for name in ((names,) if isinstance(names, str) else names):
+                if name not in slots and name not in ('__dict__', '__weakref__'):
+                    slots.append(name)
+            for k, v in base.__dict__.items():
+                if k in defaults or k in self.RESERVED or inspect.isroutine(v) or inspect.isdatadescriptor(v):
+                    continue
+                defaults.append(k)
+        if not hasattr(obj, '__dict__') and not slots:
+            return 'none', (), ()
+        return 'fields', tuple(defaults), tuple(slots)
+
     def encode_object(self, obj: Any) -> str:
-        if self.has_func(obj, '__getstate__'):
-            data = obj.getstate()
+        chunks = self.iter_object(obj)
+        if chunks is not None:
+            return ''.join(chunks)
+
+    def iter_object(self, obj: Any, align: int=0) -> Iterable[str]:
+        kind, defaults, slots = self.plan(obj)
+        if kind == 'fields':
+            data = self.object_data(obj, defaults, slots)
+            if self.accelerated:
+                plain = self.encode_plain(data)
+                if plain is not None:
+                    return (plain,)
+            return self.iter_dict(data, align)
+        elif kind == 'state':
+            data = obj.__getstate__()
             if data is not False:
-                return self.scan(data)
-        if self.has_func(obj, '__json__'):
-            return obj.__json__()
-        if hasattr(obj, '__dict__') or hasattr(obj, '__slots__'):
-            if hasattr(obj, '__dict__'):
-                data = dict(obj.__dict__)
-            elif hasattr(obj, '__slots__'):
-                data = dict(obj.__slots__)
-            else:
-                data = dict()
-            for base in inspect.getmro(type(obj)):
-                if hasattr(base, '__dict__'):
-                    data.update({k: v for k, v in base.__dict__.items() if k not in data})
-                elif hasattr(base, '__slots__'):
-                    if hasattr(base, base.__slots__[0]):
-                        for item in base.__slots__:
-                            data[item] = getattr(base, item)
-                    else:
-                        data[base.__slots__] = getattr(base, base.__slots__)
-            return self.scan({k: v for k, v in data.items()
-                              if k not in dir(type('', (), {})) and not inspect.isroutine(v)})
+                return self.iterscan(data, True, align)
+            if self.has_func(obj, '__json__'):
+                return (obj.__json__(),)
+        elif kind == 'json':
+            return (obj.__json__(),)
+
+    def object_data(self, obj: Any, defaults: Tuple[str, ...], slots: Tuple[str, ...]) -> Dict[str, Any]:
+        reserved = self.RESERVED
+        is_routine = self.is_routine
+        data = {k: v for k, v in getattr(obj, '__dict__', {}).items() if k not in reserved and not is_routine(v)}
+        for name in slots:
+            if name not in data:
+                value = getattr(obj, name, data)
+                if value is not data and not is_routine(value):
+                    data[name] = value
+        for name in defaults:
+            if name not in data:
+                value = getattr(obj, name, data)
+                if value is not data:
+                    data[name] = value
+        return data
 
 
 # Decoders ####################################################################
@@ -292,11 +599,30 @@ class BasicDecoder(Decoder):
     whitespace_re = re.compile(r'[ \t\n\r]*', RE_FLAGS)
     null_re = re.compile(r'null')
     boolean_re = re.compile(r'true|false')
-    number_re = re.compile(r'(-?(?:0|[1-9]\d*))(\.\d+)?([eE][-+]?\d+)?', RE_FLAGS)
+    number_re = re.compile(r'-?(?:0|[1-9]\d*)(\.\d+)?([eE][-+]?\d+)?', RE_FLAGS)
     chunk_str_re = re.compile(r'(.*?)(["\\])', RE_FLAGS)
-
-    def __init__(self, encoding: str):
+    escaped_str_re = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', RE_FLAGS)
+    unescape_re = re.compile(r'\\(?:u([dD][89abAB][0-9a-fA-F]{2})\\u([dD][c-fC-F][0-9a-fA-F]{2})'
+                             r'|u([0-9a-fA-F]{4})|(.))', RE_FLAGS)
+    bracket_re = re.compile(r'[^"\[\]{}]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]{}]*){0,64}([\[\]{}])?', RE_FLAGS)
+    separator_re = re.compile(r'[^"\[\]{},]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]{},]*){0,64}([\[\]{},])?', RE_FLAGS)
+    MEMO_SIZE = 4096
+    MAX_EXACT_INT = 2 ** 53
+    NUMBER_TYPES = frozenset((int, float))
+    SPEEDUP_METHODS = ('scan', 'scan_stack', 'match_key', 'skip_whitespace', 'decode_null', 'decode_boolean',
+                       'decode_number', 'decode_array', 'decode_object')
+    c_scanner = None
+
+    def __init__(self, encoding: str, intern_keys: bool=False, decimal: bool=False, numeric_arrays: bool=False,
+                 accelerated: bool=False, max_depth: int=None):
         super(BasicDecoder, self).__init__(encoding)
+        self.intern_keys = intern_keys
+        self.accelerated = accelerated
+        self.max_depth = max_depth
+        self.memo = dict()
+        self.decimal = decimal
+        self.numeric_arrays = numeric_arrays
+        self.parse_float = Decimal if decimal else float
 
     def skip_whitespace(self, s: str, pos: int) -> int:
         return self.whitespace_re.match(s, pos).end()
@@ -305,10 +631,77 @@ class BasicDecoder(Decoder):
         if not s or not isinstance(s, str):
             raise JsoneaseDecodeError(s, 0, 'Only "str" type is acceptable: ')
         pos = self.utf8_bom_re.match(s).end()
-        obj, pos = self.scan(s, pos)
+        try:
+            obj, pos = self.scan_document(s, pos)
+        finally:
+            self.memo.clear()
         if self.skip_whitespace(s, pos) != len(s):
             raise JsoneaseDecodeError(s, pos, 'Incorrect end of json string: ')
-        return obj
+        return self.finish_document(obj)
+
+    def make_c_scanner(self) -> Any:
+        cls = type(self)
+        if any(getattr(cls, name, None) not in _scanner_methods for name in self.SPEEDUP_METHODS if hasattr(cls, name)):
+            return False
+        plain_keys = all(getattr(cls, name) is getattr(BasicDecoder, name)
+                         for name in ('decode_key', 'decode_key_string', 'memoize', 'decode_string', 'unescape'))
+        plain_strings = cls.decode_string is BasicDecoder.decode_string and cls.unescape is BasicDecoder.unescape
+        plain_arrays = cls.finish_array is BasicDecoder.finish_array and not self.numeric_arrays
+        object_hook = None if cls.finish_object is BasicDecoder.finish_object else self.finish_object
+        if (self.accelerated and plain_keys and plain_strings and plain_arrays and not self.intern_keys
+                and (self.max_depth is None or self.max_depth >= sys.getrecursionlimit())):
+            return self.make_json_scanner(object_hook)
+        if _jsonease_speedups is None:
+            return False
+        return _jsonease_speedups.make_scanner(
+            JsoneaseDecodeError, None if plain_strings else self.decode_string, None if plain_keys else self.decode_key,
+            object_hook, None if plain_arrays else self.finish_array,
+            None if self.parse_float is float else self.parse_float, bool(self.intern_keys),
+            -1 if self.max_depth is None else self.max_depth)
+
+    def make_json_scanner(self, object_hook: Callable[[Dict[str, Any]], Any]) -> Callable[[str, int], Tuple[Any, int]]:
+        scan_once = json.JSONDecoder(object_hook=object_hook, parse_float=self.parse_float,
+                                     parse_constant=self.unaccelerated, strict=False).scan_once
+        skip = self.whitespace_re.match
+
+        def scanner(s, pos):
+            try:
+                return scan_once(s, skip(s, pos).end())
+            except (StopIteration, ValueError, _Unaccelerated):
+                raise JsoneaseDecodeError(s, pos)
+        return scanner
+
+    @staticmethod
+    def unaccelerated(s: str):
+        raise _Unaccelerated()
+
+    def scan_document(self, s: str, pos: int) -> Tuple[Any, int]:
+        c_scanner = self.c_scanner
+        if c_scanner is None:
+            c_scanner = self.c_scanner = self.make_c_scanner()
+        if c_scanner:
+            try:
+                return c_scanner(s, pos)
+            except (JsoneaseDecodeError, RecursionError):
+                self.memo.clear()
+        if self.max_depth is not None:
+            self.check_depth(s, pos)
+        return self.scan(s, pos)
+
+    def check_depth(self, s: str, pos: int):
+        depth = 0
+        while True:
+            m = self.bracket_re.match(s, pos)
+            if m.lastindex is None:
+                if m.end() == pos:
+                    return
+            elif m.group(1) == '[' or m.group(1) == '{':
+                if depth >= self.max_depth:
+                    raise JsoneaseDecodeError(s, m.start(1), 'Exceeded maximum nesting depth of json string: ')
+                depth += 1
+            else:
+                depth -= 1
+            pos = m.end()
 
     def scan(self, s: str, pos: int) -> Tuple[Any, int]:
         pos = self.skip_whitespace(s, pos)
@@ -343,41 +736,51 @@ class BasicDecoder(Decoder):
         m = self.number_re.match(s, pos)
         if m is None:
             raise JsoneaseDecodeError(s, pos, 'Can not decode json "number" string: ')
-        i, f, e = m.groups()
-        if f or e:
-            return float(m.group()), m.end()
-        else:
-            return int(i), m.end()
+        end = m.end()
+        if m.lastindex:
+            return self.parse_float(s[pos: end]), end
+        return int(s[pos: end]), end
 
     def decode_string(self, s: str, pos: int) -> Tuple[str, int]:
-        _string = StringIO()
-        end = pos + 1
-        while True:
-            m = self.chunk_str_re.match(s, end)
-            if m is None:
-                raise JsoneaseDecodeError(s, pos, 'Can not decode json "string" string: ')
-            chunk, term = m.groups()
-            if chunk:
-                _string.write(chunk)
-            end = m.end()
-            if term == '"':
-                break
-            else:
-                try:
-                    esc = s[end]
-                except IndexError:
-                    raise JsoneaseDecodeError(s, pos, 'Can not decode json "string" string: ')
-                if esc == 'u':
-                    char = bytes(s[end - 1: end + 5], 'utf-8').decode('unicode-escape')
-                    end += 5
-                else:
-                    try:
-                        char = self.BACKSLASH[esc]
-                        end += 1
-                    except KeyError:
-                        raise JsoneaseDecodeError(s, pos, 'Can not decode json "string" string: ')
-                _string.write(char)
-        return _string.getvalue(), end
+        end = s.find('"', pos + 1)
+        if end != -1 and s.find('\\', pos + 1, end) == -1:
+            return s[pos + 1: end], end + 1
+        m = self.escaped_str_re.match(s, pos + 1)
+        if m is None:
+            raise JsoneaseDecodeError(s, pos, 'Can not decode json "string" string: ')
+        try:
+            return self.unescape_re.sub(self.unescape, s[pos + 1: m.end() - 1]), m.end()
+        except KeyError:
+            raise JsoneaseDecodeError(s, pos, 'Can not decode json "string" string: ')
+
+    def decode_key(self, s: str, pos: int) -> Tuple[str, int]:
+        if s[pos] != '"':
+            raise JsoneaseDecodeError(s, pos, 'Can not decode json "string" string: ')
+        end = s.find('"', pos + 1)
+        raw = s[pos + 1: end] if end != -1 else None
+        key = self.memo.get(raw)
+        if key is not None:
+            return key, end + 1
+        key, end = self.decode_key_string(s, pos)
+        return self.memoize(raw, key, raw is not None and end - pos - 2 == len(raw)), end
+
+    def decode_key_string(self, s: str, pos: int) -> Tuple[str, int]:
+        return self.decode_string(s, pos)
+
+    def memoize(self, raw: str, key: Any, plain: bool=True) -> Any:
+        if self.intern_keys and type(key) is str:
+            key = sys.intern(key)
+        if plain and len(self.memo) < self.MEMO_SIZE:
+            self.memo[raw] = key
+        return key
+
+    def unescape(self, m: Any) -> str:
+        high, low, code, esc = m.groups()
+        if esc is not None:
+            return self.BACKSLASH[esc]
+        elif code is not None:
+            return chr(int(code, 16))
+        return chr(0x10000 + ((int(high, 16) - 0xD800) << 10) + (int(low, 16) - 0xDC00))
 
     def decode_array(self, s: str, pos: int) -> Tuple[List[Any], int]:
         _array = list()
@@ -395,16 +798,16 @@ class BasicDecoder(Decoder):
                 continue
             else:
                 raise JsoneaseDecodeError(s, pos, 'Can not decode json "array" string: ')
-        return _array, end + 1
+        return self.finish_array(_array), end + 1
 
     def decode_object(self, s: str, pos: int) -> Tuple[Dict[str, Any], int]:
         _obj = dict()
         end = self.skip_whitespace(s, pos+1)
         if s[end] == '}':
-            return _obj, end + 1
+            return self.finish_object(_obj), end + 1
         while True:
             end = self.skip_whitespace(s, end)
-            key, end = self.decode_string(s, end)
+            key, end = self.decode_key(s, end)
             end = self.skip_whitespace(s, end)
             if s[end] != ':':
                 raise JsoneaseDecodeError(s, pos, 'Can not decode json "object" string: ')
@@ -418,12 +821,462 @@ class BasicDecoder(Decoder):
                 continue
             else:
                 raise JsoneaseDecodeError(s, pos, 'Can not decode json "object" string: ')
-        return _obj, end + 1
+        return self.finish_object(_obj), end + 1
+
+    def split_array(self, s: str, pos: int, size: int) -> Union[Tuple[List[Tuple[int, int]], int], None]:
+        slices = []
+        start = pos + 1
+        depth = 0
+        end = pos
+        while True:
+            if depth == 1 and end - start >= size:
+                m = self.separator_re.match(s, end)
+            else:
+                m = self.bracket_re.match(s, end, start + size if depth == 1 else len(s))
+            if m.lastindex is None:
+                if m.end() == end:
+                    if s[end: end + 1] != '"':
+                        return None
+                    m = self.escaped_str_re.match(s, end + 1)
+                    if m is None:
+                        return None
+                end = m.end()
+                continue
+            c = m.group(1)
+            end = m.end()
+            if c == ',':
+                slices.append((start, m.start(1)))
+                start = end
+            elif c == '[' or c == '{':
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    if c != ']':
+                        return None
+                    slices.append((start, m.start(1)))
+                    return slices, end
+
+    def scan_elements(self, s: str) -> List[Any]:
+        values = []
+        pos = 0
+        try:
+            while True:
+                value, pos = self.scan_document(s, pos)
+                values.append(value)
+                pos = self.skip_whitespace(s, pos)
+                if pos == len(s):
+                    return values
+                if s[pos] != ',':
+                    raise JsoneaseDecodeError(s, pos, 'Can not decode json "array" string: ')
+                pos += 1
+        finally:
+            self.memo.clear()
+
+    def finish_document(self, obj: Any) -> Any:
+        return obj
+
+    def finish_object(self, obj: Dict[str, Any]) -> Any:
+        return obj
+
+    def finish_array(self, obj: List[Any]) -> Any:
+        if not self.numeric_arrays or not obj:
+            return obj
+        types = set(map(type, obj))
+        if not types <= self.NUMBER_TYPES:
+            return obj
+        if int in types and not all(-self.MAX_EXACT_INT <= v <= self.MAX_EXACT_INT for v in obj):
+            return obj
+        return array('d', obj)
 
 
 _default_decoder = BasicDecoder(JSON_ENCODING)
 
 
+class StackDecoder(BasicDecoder):
+    MAX_DEPTH = 10000
+
+    def __init__(self, encoding: str=JSON_ENCODING, intern_keys: bool=False, max_depth: int=None,
+                 decimal: bool=False, numeric_arrays: bool=False, accelerated: bool=False):
+        super(StackDecoder, self).__init__(encoding, intern_keys, decimal, numeric_arrays, accelerated,
+                                           self.MAX_DEPTH if max_depth is None else max_depth)
+
+    def check_depth(self, s: str, pos: int):
+        pass
+
+    def scan(self, s: str, pos: int) -> Tuple[Any, int]:
+        try:
+            return self.scan_stack(s, pos)
+        except IndexError:
+            raise JsoneaseDecodeError(s, len(s), 'Incorrect end of json string: ')
+
+    def scan_stack(self, s: str, pos: int) -> Tuple[Any, int]:
+        skip = self.whitespace_re.match
+        stack = []
+        while True:
+            pos = skip(s, pos).end()
+            c = s[pos]
+            if c == '[' or c == '{':
+                if len(stack) >= self.max_depth:
+                    raise JsoneaseDecodeError(s, pos, 'Exceeded maximum nesting depth of json string: ')
+                start = pos
+                pos = skip(s, pos + 1).end()
+                if c == '[':
+                    if s[pos] != ']':
+                        stack.append([list(), start, None])
+                        continue
+                    value, pos = list(), pos + 1
+                elif s[pos] != '}':
+                    key, pos = self.decode_key(s, pos)
+                    pos = skip(s, pos).end()
+                    if s[pos] != ':':
+                        raise JsoneaseDecodeError(s, start, 'Can not decode json "object" string: ')
+                    stack.append([dict(), start, key])
+                    pos += 1
+                    continue
+                else:
+                    value, pos = self.finish_object(dict()), pos + 1
+            elif c == 'n':
+                value, pos = self.decode_null(s, pos)
+            elif c == 't' or c == 'f':
+                value, pos = self.decode_boolean(s, pos)
+            elif c in '-0123456789':
+                value, pos = self.decode_number(s, pos)
+            elif c == '"':
+                value, pos = self.decode_string(s, pos)
+            else:
+                raise JsoneaseDecodeError(s, pos)
+            while stack:
+                top = stack[-1]
+                container, start, key = top
+                pos = skip(s, pos).end()
+                if key is None:
+                    container.append(value)
+                    if s[pos] == ']':
+                        stack.pop()
+                        value, pos = self.finish_array(container), pos + 1
+                        continue
+                    elif s[pos] == ',':
+                        pos += 1
+                        break
+                    raise JsoneaseDecodeError(s, start, 'Can not decode json "array" string: ')
+                else:
+                    container[key] = value
+                    if s[pos] == '}':
+                        stack.pop()
+                        value, pos = self.finish_object(container), pos + 1
+                        continue
+                    elif s[pos] == ',':
+                        pos = skip(s, pos + 1).end()
+                        top[2], pos = self.decode_key(s, pos)
+                        pos = skip(s, pos).end()
+                        if s[pos] != ':':
+                            raise JsoneaseDecodeError(s, start, 'Can not decode json "object" string: ')
+                        pos += 1
+                        break
+                    raise JsoneaseDecodeError(s, start, 'Can not decode json "object" string: ')
+            else:
+                return value, pos
+
+
+class TokenDecoder(StackDecoder):
+    token_re = re.compile(r'[ \t\n\r]*(?:(?P<string>"[^"\\]*")|(?P<op>[\[\]{}:,])'
+                          r'|(?P<float>-?(?:0|[1-9]\d*)(?:\.\d+(?:[eE][-+]?\d+)?|[eE][-+]?\d+))'
+                          r'|(?P<int>-?(?:0|[1-9]\d*))|(?P<escaped>")|(?P<true>true)|(?P<false>false)|(?P<null>null))',
+                          RE_FLAGS)
+
+    def __init__(self, encoding: str=JSON_ENCODING, intern_keys: bool=False, max_depth: int=None,
+                 decimal: bool=False, numeric_arrays: bool=False, accelerated: bool=False):
+        super(TokenDecoder, self).__init__(encoding, intern_keys, max_depth, decimal, numeric_arrays, accelerated)
+
+    def token_error(self, s: str, pos: int) -> JsoneaseDecodeError:
+        pos = self.skip_whitespace(s, pos)
+        c = s[pos: pos + 1]
+        if not c:
+            return JsoneaseDecodeError(s, pos, 'Incorrect end of json string: ')
+        elif c == 'n':
+            return JsoneaseDecodeError(s, pos, 'Can not decode json "null" string: ')
+        elif c == 't' or c == 'f':
+            return JsoneaseDecodeError(s, pos, 'Can not decode json "boolean" string: ')
+        elif c and c in '-0123456789':
+            return JsoneaseDecodeError(s, pos, 'Can not decode json "number" string: ')
+        return JsoneaseDecodeError(s, pos)
+
+    def key_error(self, s: str, pos: int) -> JsoneaseDecodeError:
+        pos = self.skip_whitespace(s, pos)
+        if pos == len(s):
+            return JsoneaseDecodeError(s, pos, 'Incorrect end of json string: ')
+        return JsoneaseDecodeError(s, pos, 'Can not decode json "string" string: ')
+
+    def container_error(self, s: str, pos: int, start: int, msg: str) -> JsoneaseDecodeError:
+        if self.skip_whitespace(s, pos) == len(s):
+            return JsoneaseDecodeError(s, len(s), 'Incorrect end of json string: ')
+        return JsoneaseDecodeError(s, start, msg)
+
+    def match_key(self, s: str, m: Any, start: int) -> Tuple[str, int]:
+        kind = m.lastgroup
+        if kind == 'string':
+            raw, pos = m.group(kind)[1:-1], m.end()
+            key = self.memo.get(raw)
+            if key is None:
+                key = self.memoize(raw, raw)
+        elif kind == 'escaped':
+            key, pos = self.decode_string(s, m.end() - 1)
+        else:
+            raise self.key_error(s, m.start(kind))
+        m = self.token_re.match(s, pos)
+        if m is None or m.lastgroup != 'op' or m.group('op') != ':':
+            raise self.container_error(s, pos, start, 'Can not decode json "object" string: ')
+        return key, m.end()
+
+    def scan_stack(self, s: str, pos: int) -> Tuple[Any, int]:
+        match = self.token_re.match
+        parse_float = self.parse_float
+        stack = []
+        m = match(s, pos)
+        while True:
+            if m is None:
+                raise self.token_error(s, pos)
+            kind = m.lastgroup
+            if kind == 'string':
+                value, pos = m.group(kind)[1:-1], m.end()
+            elif kind == 'int':
+                value, pos = int(m.group(kind)), m.end()
+            elif kind == 'float':
+                value, pos = parse_float(m.group(kind)), m.end()
+            elif kind == 'escaped':
+                value, pos = self.decode_string(s, m.end() - 1)
+            elif kind == 'op':
+                c = m.group(kind)
+                start = m.start(kind)
+                if c != '[' and c != '{':
+                    raise JsoneaseDecodeError(s, start)
+                if len(stack) >= self.max_depth:
+                    raise JsoneaseDecodeError(s, start, 'Exceeded maximum nesting depth of json string: ')
+                pos = m.end()
+                m = match(s, pos)
+                if m is not None and m.lastgroup == 'op' and m.group('op') == (']' if c == '[' else '}'):
+                    value, pos = (list() if c == '[' else self.finish_object(dict())), m.end()
+                elif c == '[':
+                    stack.append([list(), start, None])
+                    continue
+                else:
+                    if m is None:
+                        raise self.key_error(s, pos)
+                    key, pos = self.match_key(s, m, start)
+                    stack.append([dict(), start, key])
+                    m = match(s, pos)
+                    continue
+            elif kind == 'true':
+                value, pos = True, m.end()
+            elif kind == 'false':
+                value, pos = False, m.end()
+            else:
+                value, pos = None, m.end()
+            while stack:
+                top = stack[-1]
+                container, start, key = top
+                m = match(s, pos)
+                c = m.group('op') if m is not None and m.lastgroup == 'op' else None
+                if key is None:
+                    container.append(value)
+                    if c == ']':
+                        stack.pop()
+                        value, pos = self.finish_array(container), m.end()
+                        continue
+                    elif c == ',':
+                        pos = m.end()
+                        m = match(s, pos)
+                        break
+                    raise self.container_error(s, pos, start, 'Can not decode json "array" string: ')
+                else:
+                    container[key] = value
+                    if c == '}':
+                        stack.pop()
+                        value, pos = self.finish_object(container), m.end()
+                        continue
+                    elif c == ',':
+                        pos = m.end()
+                        m = match(s, pos)
+                        if m is None:
+                            raise self.key_error(s, pos)
+                        top[2], pos = self.match_key(s, m, start)
+                        m = match(s, pos)
+                        break
+                    raise self.container_error(s, pos, start, 'Can not decode json "object" string: ')
+            else:
+                return value, pos
+
+
+_scanner_methods = frozenset(getattr(cls, name) for cls in (BasicDecoder, StackDecoder, TokenDecoder)
+                             for name in BasicDecoder.SPEEDUP_METHODS if hasattr(cls, name))
+
+
+class BytesDecoder(TokenDecoder):
+    utf8_bom_re = re.compile(rb'(?:\xef\xbb\xbf)?')
+    whitespace_re = re.compile(rb'[ \t\n\r]*', RE_FLAGS)
+    escaped_str_re = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*"', RE_FLAGS)
+    token_re = re.compile(rb'[ \t\n\r]*(?:(?P<string>"[^"\\]*")|(?P<op>[\[\]{}:,])'
+                          rb'|(?P<float>-?(?:0|[1-9]\d*)(?:\.\d+(?:[eE][-+]?\d+)?|[eE][-+]?\d+))'
+                          rb'|(?P<int>-?(?:0|[1-9]\d*))|(?P<escaped>")|(?P<true>true)|(?P<false>false)|(?P<null>null))',
+                          RE_FLAGS)
+
+    def __init__(self, encoding: str=JSON_ENCODING, intern_keys: bool=False, max_depth: int=None,
+                 decimal: bool=False, numeric_arrays: bool=False, accelerated: bool=False):
+        super(BytesDecoder, self).__init__(encoding, intern_keys, max_depth, decimal, numeric_arrays, accelerated)
+        if decimal:
+            self.parse_float = self.parse_decimal
+
+    @staticmethod
+    def parse_decimal(s: bytes) -> Decimal:
+        return Decimal(str(s, 'ascii'))
+
+    def decode(self, s: Union[bytes, bytearray, memoryview, mmap.mmap]) -> Any:
+        if not isinstance(s, (bytes, bytearray, memoryview, mmap.mmap)):
+            raise JsoneaseDecodeError(s, 0, 'Only "bytes" type is acceptable: ')
+        if not len(s):
+            raise JsoneaseDecodeError('', 0, 'Only "bytes" type is acceptable: ')
+        try:
+            pos = self.utf8_bom_re.match(s).end()
+            obj, pos = self.scan(s, pos)
+            if self.skip_whitespace(s, pos) != len(s):
+                raise JsoneaseDecodeError(s, pos, 'Incorrect end of json string: ')
+        except JsoneaseDecodeError as e:
+            raise self.text_error(s, e.pos, e.msg)
+        except UnicodeDecodeError:
+            try:
+                bytes(s).decode(self.encoding)
+            except UnicodeDecodeError as e:
+                raise self.text_error(s, e.start, 'Can not decode json "string" string: ')
+            raise
+        finally:
+            self.memo.clear()
+        return self.finish_document(obj)
+
+    def text_error(self, s: Union[bytes, bytearray, memoryview], pos: int, msg: str) -> JsoneaseDecodeError:
+        return JsoneaseDecodeError(bytes(s).decode(self.encoding, 'replace'),
+                                   len(bytes(s[0: pos]).decode(self.encoding, 'replace')), msg)
+
+    def token_error(self, s: bytes, pos: int) -> JsoneaseDecodeError:
+        pos = self.skip_whitespace(s, pos)
+        c = bytes(s[pos: pos + 1])
+        if not c:
+            return JsoneaseDecodeError(s, pos, 'Incorrect end of json string: ')
+        elif c == b'n':
+            return JsoneaseDecodeError(s, pos, 'Can not decode json "null" string: ')
+        elif c == b't' or c == b'f':
+            return JsoneaseDecodeError(s, pos, 'Can not decode json "boolean" string: ')
+        elif c and c in b'-0123456789':
+            return JsoneaseDecodeError(s, pos, 'Can not decode json "number" string: ')
+        return JsoneaseDecodeError(s, pos)
+
+    def decode_string(self, s: bytes, pos: int) -> Tuple[str, int]:
+        m = self.escaped_str_re.match(s, pos + 1)
+        if m is None:
+            raise JsoneaseDecodeError(s, pos, 'Can not decode json "string" string: ')
+        value = str(s[pos + 1: m.end() - 1], self.encoding)
+        try:
+            return self.unescape_re.sub(self.unescape, value), m.end()
+        except KeyError:
+            raise JsoneaseDecodeError(s, pos, 'Can not decode json "string" string: ')
+
+    def match_key(self, s: bytes, m: Any, start: int) -> Tuple[str, int]:
+        kind = m.lastgroup
+        if kind == 'string':
+            raw, pos = m.group(kind), m.end()
+            key = self.memo.get(raw)
+            if key is None:
+                key = self.memoize(raw, str(raw[1: -1], self.encoding))
+        elif kind == 'escaped':
+            key, pos = self.decode_string(s, m.end() - 1)
+        else:
+            raise self.key_error(s, m.start(kind))
+        m = self.token_re.match(s, pos)
+        if m is None or m.lastgroup != 'op' or m.group('op') != b':':
+            raise self.container_error(s, pos, start, 'Can not decode json "object" string: ')
+        return key, m.end()
+
+    def scan_stack(self, s: bytes, pos: int) -> Tuple[Any, int]:
+        match = self.token_re.match
+        parse_float = self.parse_float
+        encoding = self.encoding
+        stack = []
+        m = match(s, pos)
+        while True:
+            if m is None:
+                raise self.token_error(s, pos)
+            kind = m.lastgroup
+            if kind == 'string':
+                pos = m.end()
+                value = str(s[m.start(kind) + 1: pos - 1], encoding)
+            elif kind == 'int':
+                value, pos = int(m.group(kind)), m.end()
+            elif kind == 'float':
+                value, pos = parse_float(m.group(kind)), m.end()
+            elif kind == 'escaped':
+                value, pos = self.decode_string(s, m.end() - 1)
+            elif kind == 'op':
+                c = m.group(kind)
+                start = m.start(kind)
+                if c != b'[' and c != b'{':
+                    raise JsoneaseDecodeError(s, start)
+                if len(stack) >= self.max_depth:
+                    raise JsoneaseDecodeError(s, start, 'Exceeded maximum nesting depth of json string: ')
+                pos = m.end()
+                m = match(s, pos)
+                if m is not None and m.lastgroup == 'op' and m.group('op') == (b']' if c == b'[' else b'}'):
+                    value, pos = (list() if c == b'[' else self.finish_object(dict())), m.end()
+                elif c == b'[':
+                    stack.append([list(), start, None])
+                    continue
+                else:
+                    if m is None:
+                        raise self.key_error(s, pos)
+                    key, pos = self.match_key(s, m, start)
+                    stack.append([dict(), start, key])
+                    m = match(s, pos)
+                    continue
+            elif kind == 'true':
+                value, pos = True, m.end()
+            elif kind == 'false':
+                value, pos = False, m.end()
+            else:
+                value, pos = None, m.end()
+            while stack:
+                top = stack[-1]
+                container, start, key = top
+                m = match(s, pos)
+                c = m.group('op') if m is not None and m.lastgroup == 'op' else None
+                if key is None:
+                    container.append(value)
+                    if c == b']':
+                        stack.pop()
+                        value, pos = self.finish_array(container), m.end()
+                        continue
+                    elif c == b',':
+                        pos = m.end()
+                        m = match(s, pos)
+                        break
+                    raise self.container_error(s, pos, start, 'Can not decode json "array" string: ')
+                else:
+                    container[key] = value
+                    if c == b'}':
+                        stack.pop()
+                        value, pos = self.finish_object(container), m.end()
+                        continue
+                    elif c == b',':
+                        pos = m.end()
+                        m = match(s, pos)
+                        if m is None:
+                            raise self.key_error(s, pos)
+                        top[2], pos = self.match_key(s, m, start)
+                        m = match(s, pos)
+                        break
+                    raise self.container_error(s, pos, start, 'Can not decode json "object" string: ')
+            else:
+                return value, pos
+
+
 class AdvancedDecoder(BasicDecoder):
     uuid_re = re.compile(r'[a-f0-9]{8}-[a-f0-9]{4}-[1-5][a-f0-9]{3}-[89ab][a-f0-9]{3}-[a-f0-9]{12}', re.IGNORECASE)
     date_re = re.compile(r'(?P<year>[12]\d{3})-(?P<month>0[1-9]|1[0-2])-(?P<day>0[1-9]|[12]\d|3[01])')
@@ -432,55 +1285,113 @@ class AdvancedDecoder(BasicDecoder):
     datetime_re = re.compile(date_re.pattern + r'[T ]' + time_re.pattern +
                              r'(?P<tzinfo>Z|[+-][0-9]{2}(?::?[0-9]{2})?)?')
 
-    def __init__(self, encoding: str=JSON_ENCODING):
-        super(AdvancedDecoder, self).__init__(encoding)
+    SNIFF_CHARS = frozenset('0123456789abcdefABCDEF')
+
+    def __init__(self, encoding: str=JSON_ENCODING, intern_keys: bool=False,
+                 fields: Iterable[Union[str, Tuple[str, ...]]]=None, convert_keys: bool=True, decimal: bool=False,
+                 numeric_arrays: bool=False, accelerated: bool=False, max_depth: int=None):
+        super(AdvancedDecoder, self).__init__(encoding, intern_keys, decimal, numeric_arrays, accelerated, max_depth)
+        self.fields = None if fields is None else self.field_tree(fields)
+        self.convert_keys = convert_keys
 
     def decode_string(self, s: str, pos: int):
         obj, end = super(AdvancedDecoder, self).decode_string(s, pos)
-        m = self.uuid_re.fullmatch(obj)
-        if m:
-            return uuid.UUID(obj), end
-        m = self.datetime_re.fullmatch(obj)
-        if m:
-            kw = m.groupdict()
-            if 'microsecond' in kw and kw['microsecond']:
-                kw['microsecond'] = kw['microsecond'].ljust(6, '0')
-            tz = kw.pop('tzinfo')
-            if tz == 'Z' or tz == 'z':
-                tz = timezone.utc
-            elif tz is not None:
-                offset_mins = int(tz[-2:]) if len(tz) > 3 else 0
-                offset = 60 * int(tz[1:3]) + offset_mins
-                if tz[0] == '-':
-                    offset = -offset
-                tz = timezone(timedelta(minutes=offset))
-            kw = {k: int(v) for k, v in kw.items() if v is not None}
-            kw['tzinfo'] = tz
-            return datetime(**kw), end
-        m = self.date_re.fullmatch(obj)
-        if m:
-            return date(**{k: int(v) for k, v in m.groupdict().items()}), end
-        m = self.time_re.fullmatch(obj)
-        if m:
-            kw = m.groupdict()
-            if 'microsecond' in kw and kw['microsecond']:
-                kw['microsecond'] = kw['microsecond'].ljust(6, '0')
-            return time(**{k: int(v) for k, v in kw.items() if v is not None}), end
+        if self.fields is None:
+            return self.convert(obj), end
         return obj, end
 
-    def decode_object(self, s: str, pos: int):
-        obj, end = super(AdvancedDecoder, self).decode_object(s, pos)
+    def decode_key_string(self, s: str, pos: int):
+        if self.convert_keys:
+            return self.decode_string(s, pos)
+        return super(AdvancedDecoder, self).decode_string(s, pos)
+
+    def convert(self, obj: str) -> Any:
+        n = len(obj)
+        if n < 5 or n > 38 or obj[0] not in self.SNIFF_CHARS:
+            return obj
+        if n == 36:
+            m = self.uuid_re.fullmatch(obj)
+            if m:
+                return uuid.UUID(obj)
+        if n >= 16 and obj[4] == '-':
+            m = self.datetime_re.fullmatch(obj)
+            if m:
+                kw = m.groupdict()
+                if 'microsecond' in kw and kw['microsecond']:
+                    kw['microsecond'] = kw['microsecond'].ljust(6, '0')
+                tz = kw.pop('tzinfo')
+                if tz == 'Z' or tz == 'z':
+                    tz = timezone.utc
+                elif tz is not None:
+                    offset_mins = int(tz[-2:]) if len(tz) > 3 else 0
+                    offset = 60 * int(tz[1:3]) + offset_mins
+                    if tz[0] == '-':
+                        offset = -offset
+                    tz = timezone(timedelta(minutes=offset))
+                kw = {k: int(v) for k, v in kw.items() if v is not None}
+                kw['tzinfo'] = tz
+                return datetime(**kw)
+        elif n == 10 and obj[4] == '-':
+            m = self.date_re.fullmatch(obj)
+            if m:
+                return date(**{k: int(v) for k, v in m.groupdict().items()})
+        elif n <= 21 and obj[2] == ':':
+            m = self.time_re.fullmatch(obj)
+            if m:
+                kw = m.groupdict()
+                if 'microsecond' in kw and kw['microsecond']:
+                    kw['microsecond'] = kw['microsecond'].ljust(6, '0')
+                return time(**{k: int(v) for k, v in kw.items() if v is not None})
+        return obj
+
+    @staticmethod
+    def field_tree(fields: Iterable[Union[str, Tuple[str, ...]]]) -> Dict[Any, Any]:
+        tree = dict()
+        for field in fields:
+            node = tree
+            for key in (field.split('.') if isinstance(field, str) else field):
+                node = node.setdefault(key, dict())
+            node[None] = True
+        return tree
+
+    def convert_fields(self, obj: Any, tree: Dict[Any, Any]) -> Any:
+        if type(obj) is list:
+            for i, value in enumerate(obj):
+                obj[i] = self.convert_fields(value, tree)
+        elif type(obj) is dict:
+            for key, node in tree.items():
+                if key is not None and key in obj:
+                    obj[key] = self.convert_fields(obj[key], node)
+        elif None in tree and isinstance(obj, str):
+            return self.convert(obj)
+        return obj
+
+    def finish_document(self, obj: Any) -> Any:
+        if self.fields is None:
+            return obj
+        return self.convert_fields(obj, self.fields)
+
+    def finish_object(self, obj: Dict[str, Any]) -> Any:
         if len(obj) == 2 and all(map(lambda x: x in obj, ('real', 'imag'))):
             obj = complex(**{k: v for k, v in obj.items() if v is not None})
         elif len(obj) == 3 and all(map(lambda x: x in obj, ('start', 'stop', 'step'))):
             obj = slice(*[v for v in obj.values() if v is not None])
-        return obj, end
+        return obj
 
 
 class CustomDecoder(AdvancedDecoder):
-    
-    def __init__(self, encoding: str=JSON_ENCODING):
-        super(CustomDecoder, self).__init__(encoding)
+    SCALARS = (type(None), bool, str, int, float, datetime, date, time, uuid.UUID)
+    PLAIN_TYPES = frozenset((Any, object, type(None), bool, str, int, float, complex, slice, datetime, date, time,
+                             uuid.UUID, list, dict, inspect.Parameter.empty))
+
+    def __init__(self, encoding: str=JSON_ENCODING, intern_keys: bool=False, fields: Iterable[str]=None,
+                 convert_keys: bool=True, decimal: bool=False, numeric_arrays: bool=False, accelerated: bool=False,
+                 max_depth: int=None):
+        super(CustomDecoder, self).__init__(encoding, intern_keys, fields, convert_keys, decimal, numeric_arrays,
+                                            accelerated, max_depth)
+        self.plans = dict()
+        self.compiling = dict()
+        self.lock = threading.RLock()
 
     def decode(self, s: str, clazz: type=None) -> Any:
         obj = super(CustomDecoder, self).decode(s)
@@ -490,29 +1401,684 @@ class CustomDecoder(AdvancedDecoder):
             return self.customize(obj, clazz)
 
     def customize(self, obj: Any, clazz: Type):
-        values = inspect.signature(clazz.__init__).parameters.values()
-        values = list(values)[1:] if len(values) > 1 else None
-        if values is None:
-            return clazz()
-        elif isinstance(obj, (type(None), bool, str, int, float, datetime, date, time, uuid.UUID)):
-            if len(values) != 1:
-                raise JsoneaseCastError(obj, clazz)
-            return clazz(obj)
-        elif isinstance(obj, (abc.Sequence, abc.Set)):
-            if len(values) != len(obj):
-                raise JsoneaseCastError(obj, clazz)
-            return clazz(*obj)
+        convert = self.converter(clazz)
+        return obj if convert is None else convert(obj)
+
+    def converter(self, tp: Any) -> Callable[[Any], Any]:
+        try:
+            return self.plans[tp]
+        except KeyError:
+            pass
+        except TypeError:
+            return self.compile_converter(tp)
+        with self.lock:
+            compiling = self.compiling
+            if tp in compiling:
+                return compiling[tp]
+            if tp in self.plans:
+                return self.plans[tp]
+            outermost = not compiling
+            if isinstance(tp, type) and tp not in self.PLAIN_TYPES:
+                compiling[tp] = lambda obj: self.plans[tp](obj)
+            try:
+                convert = compiling[tp] = self.compile_converter(tp)
+                if outermost:
+                    self.plans.update(compiling)
+            finally:
+                if outermost:
+                    compiling.clear()
+        return convert
+
+    def compile_converter(self, tp: Any) -> Callable[[Any], Any]:
+        if tp in self.PLAIN_TYPES or isinstance(tp, TypeVar):
+            return None
+        origin = getattr(tp, '__origin__', None)
+        args = tuple(a for a in getattr(tp, '__args__', None) or () if not isinstance(a, TypeVar))
+        if origin is Union or (UnionType is not None and isinstance(tp, UnionType)):
+            options = [self.converter(a) for a in args if a is not type(None)]
+            if len(options) != 1:
+                return None
+            convert = options[0]
+            return None if convert is None else lambda obj: None if obj is None else convert(obj)
+        elif origin is not None:
+            return self.compile_generic(tp, origin, args)
+        elif not isinstance(tp, type):
+            return None
+        elif dataclasses is not None and dataclasses.is_dataclass(tp):
+            hints = self.type_hints(tp)
+            params = [(f.name, self.converter(hints.get(f.name, Any)),
+                       f.default is dataclasses.MISSING and f.default_factory is dataclasses.MISSING)
+                      for f in dataclasses.fields(tp) if f.init]
+        elif issubclass(tp, tuple) and hasattr(tp, '_fields'):
+            hints = self.type_hints(tp)
+            defaults = getattr(tp, '_field_defaults', {})
+            params = [(name, self.converter(hints.get(name, Any)), name not in defaults) for name in tp._fields]
         else:
-            if len(values) > len(obj):
-                raise JsoneaseCastError(obj, clazz)
-            keys = list(inspect.signature(clazz.__init__).parameters.keys())[1:]
-            _obj = {}
-            for key in keys:
-                if key in obj:
-                    _obj[key] = obj[key]
+            try:
+                signature = inspect.signature(tp.__init__)
+            except (TypeError, ValueError):
+                return None
+            hints = self.type_hints(tp.__init__)
+            values = list(signature.parameters.values())[1:]
+            params = [(p.name, self.converter(hints.get(p.name, p.annotation)), p.default is p.empty)
+                      for p in values if p.kind not in (p.VAR_POSITIONAL, p.VAR_KEYWORD)]
+            return self.compile_class(tp, params, any(p.kind == p.VAR_POSITIONAL for p in values),
+                                      any(p.kind == p.VAR_KEYWORD for p in values))
+        return self.compile_class(tp, params)
+
+    def compile_generic(self, tp: Any, origin: Any, args: Tuple) -> Callable[[Any], Any]:
+        if not isinstance(origin, type):
+            return None
+        elif issubclass(origin, abc.Mapping):
+            key = self.converter(args[0]) if args else None
+            value = self.converter(args[1]) if len(args) > 1 else None
+            if key is None and value is None:
+                return None
+            key = key or (lambda k: k)
+            value = value or (lambda v: v)
+            return lambda obj: {key(k): value(v) for k, v in obj.items()}
+        elif issubclass(origin, tuple):
+            if len(args) == 2 and args[1] is Ellipsis:
+                item = self.converter(args[0])
+                return tuple if item is None else lambda obj: tuple(item(v) for v in obj)
+            items = [self.converter(a) or (lambda v: v) for a in args]
+            return lambda obj: tuple(c(v) for c, v in zip(items, obj))
+        elif issubclass(origin, (abc.Sequence, abc.Set)):
+            item = self.converter(args[0]) if args else None
+            make = set if issubclass(origin, abc.Set) else list
+            if item is None:
+                return None if make is list else make
+            if make is list:
+                return lambda obj: [item(v) for v in obj]
+            return lambda obj: make(item(v) for v in obj)
+        return None
+
+    def compile_class(self, clazz: type, params: List[Tuple[str, Callable, bool]], var_args: bool=False,
+                      var_kwargs: bool=False) -> Callable[[Any], Any]:
+        if not params and not var_args and not var_kwargs:
+            return lambda obj: clazz()
+        required = sum(1 for _, _, r in params if r)
+        scalars = self.SCALARS
+
+        def convert(obj):
+            if isinstance(obj, dict):
+                if var_kwargs:
+                    if not all(type(key) is str for key in obj):
+                        raise JsoneaseCastError(obj, clazz)
+                    kwargs = dict(obj)
                 else:
+                    kwargs = {}
+                for name, convert_value, required_value in params:
+                    if name in obj:
+                        kwargs[name] = obj[name] if convert_value is None else convert_value(obj[name])
+                    elif required_value:
+                        raise JsoneaseCastError(obj, clazz)
+                return clazz(**kwargs)
+            elif isinstance(obj, scalars):
+                if required > 1 or not params:
+                    raise JsoneaseCastError(obj, clazz)
+                name, convert_value, _ = params[0]
+                return clazz(obj if convert_value is None else convert_value(obj))
+            elif isinstance(obj, (abc.Sequence, abc.Set)):
+                if not required <= len(obj) <= (len(obj) if var_args else len(params)):
                     raise JsoneaseCastError(obj, clazz)
-            return clazz(**_obj)
+                args = [v if c is None else c(v) for (_, c, _), v in zip(params, obj)]
+                if var_args:
+                    args.extend(islice(obj, len(params), None))
+                return clazz(*args)
+            raise JsoneaseCastError(obj, clazz)
+        return convert
+
+    @staticmethod
+    def type_hints(obj: Any) -> Dict[str, Any]:
+        try:
+            return get_type_hints(obj)
+        except Exception:
+            return getattr(obj, '__annotations__', {})
+
+
+# Streaming ###################################################################
+###############################################################################
+class StreamTokenizer:
+    number_chars_re = re.compile(r'[-+.eE0-9]*')
+    quote_re = re.compile(r'(\\*)"')
+    STRUCTURAL = '{}[]:,'
+
+    def __init__(self, encoding: str=JSON_ENCODING, whitespace: bool=False):
+        self.encoding = encoding
+        self.whitespace = whitespace
+        self.buffer = ''
+        self.pos = 0
+        self.origin = (1, 1)
+        self.started = False
+        self.closed = False
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._partial = 0
+        self._ready = False
+        self._escaped = False
+        self.parts = []
+
+    def feed(self, data: Union[str, bytes]):
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            data = self._decoder.decode(data)
+        if data:
+            self.parts.append(data)
+            self._ready = self._ready or self.completes(data)
+
+    def completes(self, data: str) -> bool:
+        c = self.buffer[self.pos: self.pos + 1]
+        if c == '"':
+            for m in self.quote_re.finditer(data):
+                if (len(m.group(1)) + (self._escaped and m.start() == 0)) % 2 == 0:
+                    return True
+            run = len(data) - len(data.rstrip('\\'))
+            self._escaped = (run % 2 == 1) != (self._escaped and run == len(data))
+            return False
+        if c and c in '-0123456789':
+            return self.number_chars_re.match(data).end() < len(data)
+        return True
+
+    def join(self):
+        consumed = self.buffer[0: self.pos]
+        if consumed:
+            line = consumed.count('\n')
+            if line:
+                self.origin = (self.origin[0] + line, len(consumed) - consumed.rindex('\n'))
+            else:
+                self.origin = (self.origin[0], self.origin[1] + len(consumed))
+        self.parts.insert(0, self.buffer[self.pos:])
+        self.buffer = ''.join(self.parts)
+        self.parts = []
+        self.pos = 0
+        self._ready = False
+
+    def close(self):
+        self.feed(self._decoder.decode(b'', True))
+        self.closed = True
+
+    def error(self, pos: int, msg: str='Can not decode json string: ') -> JsoneaseDecodeError:
+        return JsoneaseDecodeError(self.buffer, pos, msg, self.origin)
+
+    def __iter__(self) -> Iterator[Tuple[str, str, int]]:
+        if self.parts:
+            if not (self._ready or self.closed):
+                return
+            self.join()
+        self._ready = True
+        s = self.buffer
+        pos = self.pos
+        if not self.started:
+            if not s and not self.closed:
+                return
+            self.started = True
+            if s.startswith('\ufeff', pos):
+                if self.whitespace:
+                    yield 'ws', '\ufeff', pos
+                pos = self.pos = pos + 1
+        while True:
+            end = _default_decoder.whitespace_re.match(s, pos).end()
+            if end > pos and self.whitespace:
+                yield 'ws', s[pos: end], pos
+            pos = self.pos = end
+            if pos == len(s):
+                self._ready = False
+                return
+            c = s[pos]
+            if c in self.STRUCTURAL:
+                end = pos + 1
+                kind = c
+            elif c == '"':
+                end = self.string_end(s, pos)
+                if end is None:
+                    self._ready = False
+                    return
+                kind = 'string'
+            elif c in '-0123456789':
+                end = self.number_chars_re.match(s, pos).end()
+                if end == len(s) and not self.closed:
+                    self._ready = False
+                    return
+                m = _default_decoder.number_re.match(s, pos)
+                if m is None:
+                    raise self.error(pos, 'Can not decode json "number" string: ')
+                end = m.end()
+                kind = 'number'
+            elif c == 'n' or c == 't' or c == 'f':
+                if len(s) - pos < (5 if c == 'f' else 4) and not self.closed:
+                    self._ready = False
+                    return
+                m = (_default_decoder.null_re if c == 'n' else _default_decoder.boolean_re).match(s, pos)
+                if m is None:
+                    raise self.error(pos)
+                end = m.end()
+                kind = m.group()
+            else:
+                raise self.error(pos)
+            yield kind, s[pos: end], pos
+            pos = self.pos = end
+
+    def string_end(self, s: str, pos: int) -> int:
+        end = pos + self._partial + 1
+        while True:
+            m = _default_decoder.chunk_str_re.match(s, end)
+            if m is None:
+                end = len(s)
+                break
+            if m.group(2) == '"':
+                self._partial = 0
+                return m.end()
+            end = m.end() - 1
+            step = 6 if s[m.end(): m.end() + 1] == 'u' else 2
+            if end + step > len(s):
+                break
+            end += step
+        if self.closed:
+            raise self.error(pos, 'Can not decode json "string" string: ')
+        self._partial = end - pos - 1
+        self._escaped = (len(s) - len(s.rstrip('\\'))) % 2 == 1
+        return None
+
+
+class StreamDecoder:
+    def __init__(self, encoding: str=JSON_ENCODING, decoder: BasicDecoder=None):
+        self.tokenizer = StreamTokenizer(encoding)
+        self.decoder = _default_decoder if decoder is None else decoder
+        self.containers = []
+        self.prefix = ''
+        self.state = 'value'
+
+    def feed(self, data: Union[str, bytes]):
+        self.tokenizer.feed(data)
+
+    def close(self):
+        self.tokenizer.close()
+
+    def decode_token(self, method, pos: int) -> Any:
+        try:
+            return method(self.tokenizer.buffer, pos)[0]
+        except JsoneaseDecodeError as e:
+            raise self.tokenizer.error(e.pos, e.msg)
+
+    def __iter__(self) -> Iterator[Tuple[str, str, Any]]:
+        tokenizer = self.tokenizer
+        for kind, token, pos in tokenizer:
+            state = self.state
+            if state == 'value' or state == 'first_value':
+                if kind == ']' and state == 'first_value':
+                    yield self.end_container()
+                    continue
+                elif kind == '{':
+                    yield self.prefix, 'start_map', None
+                    self.containers.append(('{', self.prefix))
+                    self.state = 'first_key'
+                    continue
+                elif kind == '[':
+                    yield self.prefix, 'start_array', None
+                    self.containers.append(('[', self.prefix))
+                    self.prefix = self.prefix + '.item' if self.prefix else 'item'
+                    self.state = 'first_value'
+                    continue
+                elif kind == 'string':
+                    yield self.prefix, 'string', self.decode_token(self.decoder.decode_string, pos)
+                elif kind == 'number':
+                    yield self.prefix, 'number', self.decode_token(self.decoder.decode_number, pos)
+                elif kind == 'null':
+                    yield self.prefix, 'null', None
+                elif kind == 'true' or kind == 'false':
+                    yield self.prefix, 'boolean', kind == 'true'
+                else:
+                    raise tokenizer.error(pos)
+                self.state = 'comma' if self.containers else 'end'
+            elif state == 'key' or state == 'first_key':
+                if kind == '}' and state == 'first_key':
+                    yield self.end_container()
+                elif kind == 'string':
+                    key = self.decode_token(self.decoder.decode_key, pos)
+                    parent = self.containers[-1][1]
+                    yield parent, 'map_key', key
+                    self.prefix = '.'.join((parent, str(key))) if parent else str(key)
+                    self.state = 'colon'
+                else:
+                    raise tokenizer.error(pos, 'Can not decode json "object" string: ')
+            elif state == 'colon':
+                if kind != ':':
+                    raise tokenizer.error(pos, 'Can not decode json "object" string: ')
+                self.state = 'value'
+            elif state == 'comma':
+                container = self.containers[-1][0]
+                if kind == ',':
+                    self.state = 'value' if container == '[' else 'key'
+                elif (kind == ']' and container == '[') or (kind == '}' and container == '{'):
+                    yield self.end_container()
+                else:
+                    raise tokenizer.error(pos, 'Can not decode json "array" string: ' if container == '['
+                                          else 'Can not decode json "object" string: ')
+            else:
+                raise tokenizer.error(pos, 'Incorrect end of json string: ')
+        if tokenizer.closed and self.state != 'end':
+            raise tokenizer.error(len(tokenizer.buffer), 'Incorrect end of json string: ')
+
+    def end_container(self) -> Tuple[str, str, None]:
+        container, self.prefix = self.containers.pop()
+        self.state = 'comma' if self.containers else 'end'
+        return self.prefix, 'end_map' if container == '{' else 'end_array', None
+
+
+class ObjectBuilder:
+    def __init__(self, decoder: BasicDecoder=None):
+        self.decoder = _default_decoder if decoder is None else decoder
+        self.value = None
+        self.containers = []
+        self.keys = []
+
+    def event(self, event: str, value: Any) -> bool:
+        if event == 'map_key':
+            self.keys[-1] = value
+            return False
+        elif event == 'end_map' or event == 'end_array':
+            value = self.containers.pop()
+            self.keys.pop()
+            obj = self.decoder.finish_object(value) if event == 'end_map' else self.decoder.finish_array(value)
+            if obj is not value:
+                self.attach(obj, True)
+            return self.done()
+        elif event == 'start_map':
+            value = dict()
+        elif event == 'start_array':
+            value = list()
+        self.attach(value)
+        if event == 'start_map' or event == 'start_array':
+            self.containers.append(value)
+            self.keys.append(None)
+            return False
+        return self.done()
+
+    def done(self) -> bool:
+        if self.containers:
+            return False
+        self.value = self.decoder.finish_document(self.value)
+        return True
+
+    def attach(self, value: Any, replace: bool=False):
+        if not self.containers:
+            self.value = value
+        elif self.keys[-1] is not None:
+            self.containers[-1][self.keys[-1]] = value
+        elif replace:
+            self.containers[-1][-1] = value
+        else:
+            self.containers[-1].append(value)
+
+
+# Lazy loading ################################################################
+###############################################################################
+class LazyDocument:
+    bracket_re = re.compile(rb'[^"\[\]{}]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]{}]*){0,64}([\[\]{}])?', RE_FLAGS)
+
+    def __init__(self, buffer: Union[bytes, bytearray, memoryview, mmap.mmap], decoder: 'BytesDecoder'=None):
+        self.buffer = buffer
+        self.decoder = BytesDecoder(JSON_ENCODING) if decoder is None else decoder
+        self.closes = dict()
+        self.start = -1
+
+    def error(self, pos: int, msg: str='Can not decode json string: ') -> JsoneaseDecodeError:
+        return self.decoder.text_error(self.buffer, pos, msg)
+
+    def close(self):
+        close = getattr(self.buffer, 'close', None)
+        if close is not None:
+            close()
+
+    def check_open(self):
+        if getattr(self.buffer, 'closed', False):
+            raise ValueError('I/O operation on closed lazy document')
+
+    def __enter__(self) -> 'LazyDocument':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close_of(self, pos: int) -> int:
+        close = self.closes.get(pos)
+        if close is not None:
+            return close
+        s = self.buffer
+        closes = self.closes
+        match = self.bracket_re.match
+        stack = []
+        end = pos
+        while True:
+            m = match(s, end)
+            if m.lastindex is None:
+                if m.end() == end:
+                    if end < len(s):
+                        raise self.error(end, 'Can not decode json "string" string: ')
+                    raise self.error(end, 'Incorrect end of json string: ')
+                end = m.end()
+                continue
+            start = m.start(1)
+            end = m.end()
+            c = s[start: end]
+            if c == b'[' or c == b'{':
+                close = closes.get(start)
+                if close is not None:
+                    end = close + 1
+                else:
+                    stack.append(b']' if c == b'[' else b'}')
+            elif not stack or stack.pop() != c:
+                raise self.error(start)
+            elif not stack:
+                self.closed(pos, start)
+                return start
+
+    def closed(self, start: int, close: int):
+        self.closes[start] = close
+        if start == self.start and self.decoder.skip_whitespace(self.buffer, close + 1) != len(self.buffer):
+            raise self.error(close + 1, 'Incorrect end of json string: ')
+
+    def root(self) -> Any:
+        self.check_open()
+        s = self.buffer
+        decoder = self.decoder
+        pos = decoder.skip_whitespace(s, decoder.utf8_bom_re.match(s).end())
+        if s[pos: pos + 1] != b'[' and s[pos: pos + 1] != b'{':
+            return decoder.decode(s)
+        self.start = pos
+        return self.value(pos)
+
+    def value(self, pos: int) -> Any:
+        c = self.buffer[pos: pos + 1]
+        if c == b'[':
+            return LazyArray(self, pos)
+        elif c == b'{':
+            return LazyObject(self, pos)
+        return self.decode(pos)
+
+    def decode(self, pos: int) -> Any:
+        self.check_open()
+        try:
+            value, end = self.decoder.scan(self.buffer, pos)
+        except JsoneaseDecodeError as e:
+            raise self.error(e.pos, e.msg)
+        if pos == self.start:
+            self.closed(pos, end - 1)
+        return value
+
+    def member(self, start: int, pos: int) -> Union[Tuple[Any, int], None]:
+        self.check_open()
+        try:
+            return self.scan_member(start, pos)
+        except JsoneaseDecodeError as e:
+            raise self.error(e.pos, e.msg)
+
+    def scan_member(self, start: int, pos: int) -> Union[Tuple[Any, int], None]:
+        s = self.buffer
+        decoder = self.decoder
+        match = decoder.token_re.match
+        is_object = s[start: start + 1] == b'{'
+        close = b'}' if is_object else b']'
+        if pos == start:
+            pos = start + 1
+            m = match(s, pos)
+            if m is not None and m.lastgroup == 'op' and m.group('op') == close:
+                self.closed(start, m.start('op'))
+                return None
+        else:
+            pos = self.skip_value(pos)
+            m = match(s, pos)
+            msg = 'Can not decode json "object" string: ' if is_object else 'Can not decode json "array" string: '
+            if m is None or m.lastgroup != 'op':
+                raise decoder.container_error(s, pos, start, msg)
+            if m.group('op') == close:
+                self.closed(start, m.start('op'))
+                return None
+            if m.group('op') != b',':
+                raise decoder.container_error(s, pos, start, msg)
+            pos = m.end()
+            m = match(s, pos)
+        if m is None:
+            raise decoder.key_error(s, pos) if is_object else decoder.token_error(s, pos)
+        key = None
+        if is_object:
+            key, pos = decoder.match_key(s, m, start)
+            m = match(s, pos)
+            if m is None:
+                raise decoder.token_error(s, pos)
+        kind = m.lastgroup
+        if kind == 'op' and m.group(kind) != b'[' and m.group(kind) != b'{':
+            raise JsoneaseDecodeError(s, m.start(kind))
+        return key, m.start(kind)
+
+    def skip_value(self, pos: int) -> int:
+        s = self.buffer
+        c = s[pos: pos + 1]
+        if c == b'[' or c == b'{':
+            return self.close_of(pos) + 1
+        decoder = self.decoder
+        m = decoder.token_re.match(s, pos)
+        if m.lastgroup == 'escaped':
+            m = decoder.escaped_str_re.match(s, m.end())
+            if m is None:
+                raise JsoneaseDecodeError(s, pos, 'Can not decode json "string" string: ')
+        return m.end()
+
+
+class LazyValue:
+    document = None
+
+    def close(self):
+        self.document.close()
+
+    def __enter__(self) -> 'LazyValue':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class LazyObject(LazyValue, abc.Mapping):
+    def __init__(self, document: LazyDocument, pos: int):
+        self.document = document
+        self.pos = pos
+        self._next = pos
+        self._positions = dict()
+        self._values = dict()
+
+    def advance(self) -> bool:
+        if self._next < 0:
+            return False
+        member = self.document.member(self.pos, self._next)
+        if member is None:
+            self._next = -1
+            return False
+        key, self._next = member
+        self._positions[key] = self._next
+        return True
+
+    @property
+    def positions(self) -> Dict[str, int]:
+        while self.advance():
+            pass
+        return self._positions
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return self._values[key]
+        except KeyError:
+            positions = self._positions
+            while key not in positions and self.advance():
+                pass
+            value = self._values[key] = self.document.value(positions[key])
+            return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.positions)
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __repr__(self):
+        return '<LazyObject at %d>' % self.pos
+
+    def decode(self) -> Dict[str, Any]:
+        return self.document.decode(self.pos)
+
+
+class LazyArray(LazyValue, abc.Sequence):
+    def __init__(self, document: LazyDocument, pos: int):
+        self.document = document
+        self.pos = pos
+        self._next = pos
+        self._positions = array('q')
+        self._values = dict()
+
+    def advance(self) -> bool:
+        if self._next < 0:
+            return False
+        member = self.document.member(self.pos, self._next)
+        if member is None:
+            self._next = -1
+            return False
+        self._next = member[1]
+        self._positions.append(self._next)
+        return True
+
+    @property
+    def positions(self) -> array:
+        while self.advance():
+            pass
+        return self._positions
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+            if index < 0:
+                raise IndexError(index)
+        try:
+            return self._values[index]
+        except KeyError:
+            positions = self._positions
+            while len(positions) <= index and self.advance():
+                pass
+            value = self._values[index] = self.document.value(positions[index])
+            return value
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __eq__(self, other):
+        if not isinstance(other, abc.Sequence) or isinstance(other, (str, bytes)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self):
+        return '<LazyArray at %d>' % self.pos
+
+    def decode(self) -> List[Any]:
+        return self.document.decode(self.pos)
 
 
 # Formatter ###################################################################
@@ -663,40 +2229,808 @@ class DefaultFormatter(Formatter):
         return js.getvalue(), end + 1
 
 
-_default_formatter = DefaultFormatter()
+class StreamFormatter(Formatter):
+    def __init__(self, align: int=0, indent: int=4, item_sep: str=',\r\n', key_sep: str=': ', eol: str='\r\n',
+                 encoding: str=JSON_ENCODING):
+        super(StreamFormatter, self).__init__(align, indent, item_sep, key_sep, eol)
+        self.tokenizer = StreamTokenizer(encoding, whitespace=True)
+        self.containers = []
+        self.pending = []
+        self.state = 'start'
 
+    def feed(self, data: Union[str, bytes]):
+        self.tokenizer.feed(data)
 
-# APIs ########################################################################
-###############################################################################
-def formats(s: str, align: int=0, indent: int=4, item_sep: str=',\r\n', key_sep: str=': ', eol: str='\r\n') -> str:
-    if align == 0 and indent == 4 and item_sep == ',\r\n' and key_sep == ': ' and eol == '\r\n':
-        return _default_formatter.format(s)
-    return DefaultFormatter(align=align, indent=indent, item_sep=item_sep, key_sep=key_sep, eol=eol).format(s)
+    def close(self):
+        self.tokenizer.close()
 
+    def format(self, s: str):
+        if not s or not isinstance(s, str):
+            raise JsoneaseFormatError(s, 0, 'Only "str" type is acceptable: ')
+        self.feed(s)
+        self.close()
+        return ''.join(self)
+
+    def error(self, pos: int, msg: str='Can not format json string: ') -> JsoneaseFormatError:
+        return JsoneaseFormatError(self.tokenizer.buffer, pos, msg, self.tokenizer.origin)
+
+    def __iter__(self) -> Iterator[str]:
+        tokenizer = self.tokenizer
+        try:
+            for kind, token, pos in tokenizer:
+                state = self.state
+                if kind == 'ws':
+                    if state == 'start' or state == 'end':
+                        yield token
+                    elif state == 'first_value' or state == 'first_key':
+                        self.pending.append(token)
+                    continue
+                if state == 'first_value' or state == 'first_key':
+                    if (kind == ']' and state == 'first_value') or (kind == '}' and state == 'first_key'):
+                        yield ''.join(self.pending)
+                        yield kind
+                        self.pending.clear()
+                        self.containers.pop()
+                        self.state = 'comma' if self.containers else 'end'
+                        continue
+                    self.pending.clear()
+                    yield self.eol
+                    state = 'value' if state == 'first_value' else 'key'
+                if state == 'value' or state == 'object_value' or state == 'start':
+                    if state == 'value':
+                        yield ' ' * (self.align + self.indent * len(self.containers))
+                    elif state == 'start':
+                        yield ' ' * self.align
+                    yield token
+                    if kind == '[' or kind == '{':
+                        self.containers.append(kind)
+                        self.state = 'first_value' if kind == '[' else 'first_key'
+                    elif kind in self.tokenizer.STRUCTURAL:
+                        raise self.error(pos)
+                    else:
+                        self.state = 'comma' if self.containers else 'end'
+                elif state == 'key':
+                    if kind != 'string':
+                        raise self.error(pos, 'Can not format json "object" string: ')
+                    yield ' ' * (self.align + self.indent * len(self.containers))
+                    yield token
+                    yield self.key_sep
+                    self.state = 'colon'
+                elif state == 'colon':
+                    if kind != ':':
+                        raise self.error(pos, 'Can not format json "object" string: ')
+                    self.state = 'object_value'
+                elif state == 'comma':
+                    container = self.containers[-1]
+                    if kind == ',':
+                        yield self.item_sep
+                        self.state = 'value' if container == '[' else 'key'
+                    elif (kind == ']' and container == '[') or (kind == '}' and container == '{'):
+                        self.containers.pop()
+                        yield self.eol
+                        yield ' ' * (self.align + self.indent * len(self.containers))
+                        yield kind
+                        self.state = 'comma' if self.containers else 'end'
+                    else:
+                        raise self.error(pos, 'Can not format json "array" string: ' if container == '['
+                                         else 'Can not format json "object" string: ')
+                else:
+                    raise self.error(pos, 'Incorrect end of json string: ')
+        except JsoneaseDecodeError as e:
+            raise JsoneaseFormatError(e.s, e.pos, e.msg.replace('decode', 'format'), e.origin)
+        if tokenizer.closed and self.state != 'end':
+            raise self.error(len(tokenizer.buffer), 'Incorrect end of json string: ')
 
-def dumps(obj: Any, encoding: str=JSON_ENCODING, cls: Type[Encoder]=CustomEncoder, indent: int=None) -> str:
-    _encoder = _default_encoder if encoding == JSON_ENCODING and cls is BasicEncoder else cls(encoding)
-    js = _encoder.encode(obj)
-    if indent is not None:
-        return formats(js)
-    return js
 
+class CompactFormatter(Formatter):
+    token_re = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][-+]?\d+)?'
+                          r'|true|false|null|[^ \t\n\r]', RE_FLAGS)
+    VALUE_CHARS = frozenset('0123456789')
+    CLOSE = {'[': ']', '{': '}'}
 
-def dump(obj: Any, fp: TextIO, encoding: str=JSON_ENCODING, cls: Type[Encoder]=CustomEncoder, indent: int=None):
-    fp.write(dumps(obj=obj, encoding=encoding, cls=cls, indent=indent))
+    def __init__(self):
+        super(CompactFormatter, self).__init__(0, 0, ',', ':', '')
 
+    def format(self, s: str):
+        if not s or not isinstance(s, str):
+            raise JsoneaseFormatError(s, 0, 'Only "str" type is acceptable: ')
+        pos = 1 if s.startswith('\ufeff') else 0
+        tokens = self.token_re.findall(s, pos)
+        index, stack = self.check(tokens)
+        if index is not None:
+            raise self.error(s, pos, index, stack)
+        return ''.join(tokens)
+
+    def check(self, tokens: List[str]) -> Tuple[Union[int, None], List[str]]:
+        stack = []
+        state = 'value'
+        for index, token in enumerate(tokens):
+            c = token[0]
+            if state == 'next':
+                if c == ',' and stack:
+                    state = 'value' if stack[-1] == '[' else 'key'
+                    continue
+                elif not stack or c != self.CLOSE[stack[-1]]:
+                    return index, stack
+                stack.pop()
+            elif state == 'key' or state == 'object':
+                if c == '"' and len(token) > 1:
+                    state = 'colon'
+                    continue
+                elif state == 'key' or c != '}':
+                    return index, stack
+                stack.pop()
+            elif state == 'colon':
+                if c != ':':
+                    return index, stack
+                state = 'value'
+                continue
+            elif state == 'end':
+                return index, stack
+            elif c == '[' or c == '{':
+                stack.append(c)
+                state = 'array' if c == '[' else 'object'
+                continue
+            elif state == 'array' and c == ']':
+                stack.pop()
+            elif len(token) == 1 and c not in self.VALUE_CHARS:
+                return index, stack
+            state = 'next' if stack else 'end'
+        return (None, stack) if state == 'end' else (len(tokens), stack)
+
+    def error(self, s: str, pos: int, index: int, stack: List[str]) -> JsoneaseFormatError:
+        m = next(islice(self.token_re.finditer(s, pos), index, None), None)
+        if m is None:
+            return JsoneaseFormatError(s, len(s), 'Incorrect end of json string: ')
+        token = m.group()
+        if token == '"':
+            return JsoneaseFormatError(s, m.start(), 'Can not format json "string" string: ')
+        elif len(token) == 1 and token not in self.VALUE_CHARS and token not in '[]{},:':
+            return JsoneaseFormatError(s, m.start())
+        elif not stack and not index:
+            return JsoneaseFormatError(s, m.start())
+        elif not stack:
+            return JsoneaseFormatError(s, m.start(), 'Incorrect end of json string: ')
+        return JsoneaseFormatError(s, m.start(), 'Can not format json "array" string: ' if stack[-1] == '['
+                                   else 'Can not format json "object" string: ')
 
-def loads(s: str, encoding: str=JSON_ENCODING, cls: Type[Decoder]=CustomDecoder, clazz: type=None) -> Any:
-    if isinstance(s, bytes):
-        s = s.decode(encoding)
-    if clazz is None:
-        if encoding == JSON_ENCODING and cls is BasicDecoder:
-            return _default_decoder.decode(s)
+
+_default_formatter = DefaultFormatter()
+_compact_formatter = CompactFormatter()
+_instances = OrderedDict([((BasicEncoder, JSON_ENCODING), _default_encoder),
+                          ((BasicDecoder, JSON_ENCODING), _default_decoder),
+                          ((DefaultFormatter, 0, 4, ',\r\n', ': ', '\r\n'), _default_formatter)])
+_pinned_instances = frozenset(_instances)
+_instrumented_types = dict()
+
+
+# Instrumentation #############################################################
+###############################################################################
+class CountingDict(dict):
+    def __init__(self, data: Mapping, counter: List[int], wrap: Callable[[Any], Any]=None):
+        super(CountingDict, self).__init__(data if wrap is None else {k: wrap(v) for k, v in data.items()})
+        self.counter = counter
+        self.wrap = wrap
+
+    def __setitem__(self, key: Any, value: Any):
+        dict.__setitem__(self, key, value if self.wrap is None else self.wrap(value))
+
+    def setdefault(self, key: Any, default: Any=None) -> Any:
+        return dict.setdefault(self, key, default if self.wrap is None else self.wrap(default))
+
+    def originals(self) -> Mapping:
+        return self if self.wrap is None else {k: v.__wrapped__ for k, v in self.items()}
+
+    def get(self, key: Any, default: Any=None) -> Any:
+        value = dict.get(self, key, self)
+        if value is self:
+            self.counter[1] += 1
+            return default
+        self.counter[0] += 1
+        return value
+
+    def __getitem__(self, key: Any) -> Any:
+        try:
+            value = dict.__getitem__(self, key)
+        except KeyError:
+            self.counter[1] += 1
+            raise
+        self.counter[0] += 1
+        return value
+
+
+class Stats:
+    ENTRIES = ('decode', 'encode', 'iterencode', 'format')
+    PREFIXES = ('decode_', 'encode_', 'format_', 'match_', 'compile_', 'convert', 'customize', 'finish_object',
+                'memoize', 'scan', 'iter_')
+    CACHES = ('memo', 'dispatch', 'plans', 'routines')
+    NATIVES = ('c_encoder', 'c_scanner', 'json_encoder')
+
+    def __init__(self, callback: Callable[['Stats'], Any]=None, tokens: bool=True):
+        self.callback = callback
+        self.count_tokens = tokens
+        self.calls = dict()
+        self.times = dict()
+        self.tokens = dict()
+        self.caches = dict()
+        self.native = set()
+        self.bytes = 0
+        self.max_depth = 0
+        self.level = 0
+
+    def reset(self):
+        self.calls.clear()
+        self.times.clear()
+        self.tokens.clear()
+        self.native.clear()
+        for counter in self.caches.values():
+            counter[0] = counter[1] = 0
+        self.bytes = 0
+        self.max_depth = 0
+
+    def hit_rate(self, cache: str) -> float:
+        hits, misses = self.caches.get(cache, (0, 0))
+        return hits / (hits + misses) if hits + misses else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {'calls': dict(self.calls), 'times': dict(self.times), 'tokens': dict(self.tokens), 'bytes': self.bytes,
+                'max_depth': self.max_depth, 'hit_rates': {k: self.hit_rate(k) for k in self.caches},
+                'native': sorted(self.native)}
+
+    def __repr__(self):
+        return 'Stats(%r)' % self.as_dict()
+
+    def timed(self, name: str, func: Callable) -> Callable:
+        calls = self.calls
+        times = self.times
+
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                times[name] = times.get(name, 0.0) + perf_counter() - start
+                calls[name] = calls.get(name, 0) + 1
+        return wrapper
+
+    def iterated(self, name: str, func: Callable) -> Callable:
+        calls = self.calls
+        times = self.times
+
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                chunks = func(*args, **kwargs)
+            finally:
+                times[name] = times.get(name, 0.0) + perf_counter() - start
+                calls[name] = calls.get(name, 0) + 1
+            if chunks is None or type(chunks) is tuple:
+                return chunks
+            return self.timed_chunks(name, chunks)
+        wrapper.__wrapped__ = func
+        return wrapper
+
+    def timed_chunks(self, name: str, chunks: Iterable[str]) -> Iterator[str]:
+        times = self.times
+        it = iter(chunks)
+        while True:
+            start = perf_counter()
+            try:
+                chunk = next(it)
+            except StopIteration:
+                return
+            finally:
+                times[name] = times.get(name, 0.0) + perf_counter() - start
+            yield chunk
+
+    def handler(self, func: Callable) -> Callable:
+        return self.iterated(getattr(func, '__name__', 'handler'), func)
+
+    def entry(self, name: str, func: Callable, target: Any) -> Callable:
+        timed = self.timed(name, func)
+        encoding = getattr(target, 'encoding', None)
+
+        def wrapper(*args, **kwargs):
+            self.level += 1
+            try:
+                result = timed(*args, **kwargs)
+            finally:
+                self.level -= 1
+            if self.level == 0:
+                self.account(result if name.startswith('encode') else args[0], encoding, target)
+            return result
+
+        def iter_wrapper(*args, **kwargs):
+            if self.level:
+                return timed(*args, **kwargs)
+            chunks = list(timed(*args, **kwargs))
+            self.account(''.join(chunks), encoding, target)
+            return iter(chunks)
+        return iter_wrapper if name == 'iterencode' else wrapper
+
+    def account(self, text: Any, encoding: str, target: Any):
+        encoding = encoding or JSON_ENCODING
+        self.native.update(name for name in self.NATIVES if getattr(target, name, None))
+        if isinstance(text, str):
+            self.bytes += len(text.encode(encoding, 'replace'))
+        elif text is not None:
+            self.bytes += len(text)
+            if self.count_tokens:
+                text = bytes(text).decode(encoding, 'replace')
         else:
-            return cls(encoding).decode(s)
+            text = ''
+        if self.count_tokens:
+            self.count(text)
+        if self.callback is not None:
+            self.callback(self)
+
+    def count(self, text: str):
+        tokens = self.tokens
+        depth = 0
+        previous = None
+        for token in _compact_formatter.token_re.findall(text):
+            c = token[0]
+            if c == '"':
+                kind = 'string'
+            elif c == '{' or c == '[':
+                kind = 'object' if c == '{' else 'array'
+                depth += 1
+                if depth > self.max_depth:
+                    self.max_depth = depth
+            elif c == '}' or c == ']':
+                depth -= 1
+                previous = None
+                continue
+            elif c == ':' and previous == 'string':
+                tokens['string'] -= 1
+                tokens['key'] = tokens.get('key', 0) + 1
+                previous = None
+                continue
+            elif c == 't' or c == 'f':
+                kind = 'boolean'
+            elif c == 'n':
+                kind = 'null'
+            elif c == '-' or c.isdigit():
+                kind = 'number'
+            else:
+                previous = None
+                continue
+            tokens[kind] = tokens.get(kind, 0) + 1
+            previous = kind
+
+
+def instrument(target: Union[Encoder, Decoder, Formatter, type], stats: Stats=None,
+               callback: Callable[[Stats], Any]=None, native: bool=True) -> Stats:
+    stats = Stats(callback) if stats is None else stats
+    if isinstance(target, type):
+        _instrumented_types[target] = stats, native
+        for instance in list(_instances.values()):
+            if type(instance) is target:
+                instrument(instance, stats, native=native)
+        return stats
+    if '_instrumented' in target.__dict__:
+        uninstrument(target)
+    instrumented = target._instrumented = []
+    if native:
+        if getattr(target, 'c_encoder', False) is None:
+            target.c_encoder = target.make_c_encoder()
     else:
-        return CustomDecoder(encoding).decode(s, clazz)
+        for name in stats.NATIVES:
+            if hasattr(target, name):
+                instrumented.append((name, None))
+                setattr(target, name, False)
+    for name in dir(type(target)):
+        func = getattr(target, name)
+        if not inspect.ismethod(func):
+            continue
+        if name in stats.ENTRIES:
+            wrapper = stats.entry(name, func, target)
+        elif name.startswith(stats.PREFIXES) and (name.startswith('iter_') or inspect.isgeneratorfunction(func)):
+            wrapper = stats.iterated(name, func)
+        elif name.startswith(stats.PREFIXES):
+            wrapper = stats.timed(name, func)
+        else:
+            continue
+        instrumented.append((name, None))
+        setattr(target, name, wrapper)
+    for name in stats.CACHES:
+        cache = target.__dict__.get(name)
+        if isinstance(cache, (dict, weakref.WeakKeyDictionary)):
+            counter = stats.caches.setdefault(name, [0, 0])
+            instrumented.append((name, cache))
+            setattr(target, name, CountingDict(cache, counter, stats.handler if name == 'dispatch' else None))
+    return stats
+
+
+def uninstrument(target: Union[Encoder, Decoder, Formatter, type]):
+    if isinstance(target, type):
+        _instrumented_types.pop(target, None)
+        for instance in list(_instances.values()):
+            if type(instance) is target:
+                uninstrument(instance)
+        return
+    for name, original in target.__dict__.pop('_instrumented', ()):
+        if original is None:
+            delattr(target, name)
+        else:
+            original.update(target.__dict__[name].originals())
+            setattr(target, name, original)
+
+
+# APIs ########################################################################
+###############################################################################
+def _instance(cls: type, *args, **kwargs) -> Any:
+    key = (cls,) + args + tuple(sorted(kwargs.items())) if kwargs else (cls,) + args
+    instance = _instances.get(key)
+    if instance is not None:
+        try:
+            _instances.move_to_end(key)
+        except KeyError:
+            pass
+    else:
+        if len(_instances) >= INSTANCE_CACHE_SIZE:
+            for old in list(_instances):
+                if old not in _pinned_instances:
+                    _instances.pop(old, None)
+                    break
+        instance = _instances[key] = cls(*args, **kwargs)
+        if cls in _instrumented_types:
+            stats, native = _instrumented_types[cls]
+            instrument(instance, stats, native=native)
+    return instance
 
 
-def load(fp: TextIO, encoding: str=JSON_ENCODING, cls: Type[Decoder]=CustomDecoder, clazz: type=None) -> Any:
-    return loads(fp.read(), encoding=encoding, cls=cls, clazz=clazz)
+def formats(s: str, align: int=0, indent: int=4, item_sep: str=',\r\n', key_sep: str=': ', eol: str='\r\n') -> str:
+    return _instance(DefaultFormatter, align, indent, item_sep, key_sep, eol).format(s)
+
+
+def minify(s: str) -> str:
+    return _compact_formatter.format(s)
+
+
+def iterformat(source: Any, align: int=0, indent: int=4, item_sep: str=',\r\n', key_sep: str=': ', eol: str='\r\n',
+               encoding: str=JSON_ENCODING, chunk_size: int=65536) -> Iterator[str]:
+    formatter = StreamFormatter(align=align, indent=indent, item_sep=item_sep, key_sep=key_sep, eol=eol,
+                                encoding=encoding)
+    for chunk in _iter_chunks(source, chunk_size):
+        formatter.feed(chunk)
+        yield ''.join(formatter)
+    formatter.close()
+    yield ''.join(formatter)
+
+
+def reformat(source: Any, fp: TextIO, align: int=0, indent: int=4, item_sep: str=',\r\n', key_sep: str=': ',
+             eol: str='\r\n', encoding: str=JSON_ENCODING, chunk_size: int=65536):
+    for chunk in iterformat(source, align, indent, item_sep, key_sep, eol, encoding, chunk_size):
+        if chunk:
+            fp.write(chunk)
+
+
+def register(clazz: type, func: Callable[[Any], Any], cls: Type[BasicEncoder]=BasicEncoder):
+    cls.register(clazz, func)
+
+
+def unregister(clazz: type, cls: Type[BasicEncoder]=BasicEncoder):
+    cls.unregister(clazz)
+
+
+def invalidate(clazz: type=None):
+    """
+        Drop the handlers and plans cached for clazz, or for every type when clazz is None. Encoders keep a strong
+        reference to each type they have encoded, so call this after changing a class, and before discarding
+        classes created at runtime so they can be garbage collected.
+    """
+    for instance in list(_instances.values()):
+        if isinstance(instance, BasicEncoder):
+            instance.invalidate(clazz)
+
+
+def dumps(obj: Any, encoding: str=JSON_ENCODING, cls: Type[Encoder]=CustomEncoder, indent: int=None,
+          accelerated: bool=False, parallel: int=None, batch_size: int=1000) -> str:
+    args = (encoding,) if indent is None else (encoding, indent)
+    _encoder = _instance(cls, *args, accelerated=True) if accelerated else _instance(cls, *args)
+    if parallel and parallel > 1 and type(obj) in (list, dict):
+        return _encode_parallel(_encoder, obj, cls, args, accelerated, parallel, batch_size)
+    return _encoder.encode(obj)
+
+
+def dump(obj: Any, fp: TextIO, encoding: str=JSON_ENCODING, cls: Type[Encoder]=CustomEncoder, indent: int=None,
+         accelerated: bool=False, chunk_size: int=65536):
+    args = (encoding,) if indent is None else (encoding, indent)
+    _encoder = _instance(cls, *args, accelerated=True) if accelerated else _instance(cls, *args)
+    if not _splittable(_encoder, obj):
+        fp.write(_encoder.encode(obj))
+        return
+    pairs = type(obj) is dict
+    head = 1 + len(_encoder.eol) + _encoder.indent
+    tail = 1 + len(_encoder.eol)
+    items = iter(obj.items() if pairs else obj)
+    prefix = ('{' if pairs else '[') + _encoder.eol + ' ' * _encoder.indent
+    count = 256
+    while True:
+        batch = list(islice(items, count))
+        if not batch:
+            break
+        chunk = _encoder.encode(dict(batch) if pairs else batch)
+        fp.write(prefix + chunk[head: -tail])
+        prefix = _encoder.item_sep + ' ' * _encoder.indent
+        count = max(1, count * chunk_size // len(chunk))
+    fp.write(_encoder.eol + ('}' if pairs else ']'))
+
+
+def loads(s: str, encoding: str=JSON_ENCODING, cls: Type[Decoder]=CustomDecoder, clazz: type=None,
+          accelerated: bool=False, parallel: int=None, chunk_size: int=1048576, max_depth: int=None,
+          decimal: bool=False, numeric_arrays: bool=False) -> Any:
+    if isinstance(s, bytes) and not (isinstance(cls, type) and issubclass(cls, BytesDecoder)):
+        s = s.decode(encoding)
+    if clazz is not None:
+        cls = CustomDecoder
+    kwargs = dict()
+    if accelerated:
+        kwargs['accelerated'] = True
+    if max_depth is not None:
+        kwargs['max_depth'] = max_depth
+    if decimal:
+        kwargs['decimal'] = True
+    if numeric_arrays:
+        kwargs['numeric_arrays'] = True
+    _decoder = _instance(cls, encoding, **kwargs)
+    if parallel and parallel > 1:
+        return _decode_parallel(_decoder, s, clazz, cls, (encoding,), kwargs, parallel, chunk_size)
+    return _decoder.decode(s) if clazz is None else _decoder.decode(s, clazz)
+
+
+def load(fp: TextIO, encoding: str=JSON_ENCODING, cls: Type[Decoder]=CustomDecoder, clazz: type=None,
+         accelerated: bool=False, parallel: int=None, chunk_size: int=1048576, max_depth: int=None,
+         decimal: bool=False, numeric_arrays: bool=False) -> Any:
+    return loads(fp.read(), encoding=encoding, cls=cls, clazz=clazz, accelerated=accelerated, parallel=parallel,
+                 chunk_size=chunk_size, max_depth=max_depth, decimal=decimal, numeric_arrays=numeric_arrays)
+
+
+def load_lazy(path: str, encoding: str=JSON_ENCODING) -> Any:
+    """
+        Map the file and return its root lazily. A returned LazyObject or LazyArray owns the mapping:
+        close() it, or use it in a with block, once its values are no longer needed.
+    """
+    with open(path, 'rb') as fp:
+        try:
+            buffer = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise JsoneaseDecodeError('', 0, 'Incorrect end of json string: ')
+    document = LazyDocument(buffer, BytesDecoder(encoding))
+    try:
+        root = document.root()
+    except BaseException:
+        document.close()
+        raise
+    if not isinstance(root, LazyValue):
+        document.close()
+    return root
+
+
+def _iter_batches(iterable: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _iter_parallel(func: Callable[..., Any], tasks: Iterable[Tuple[Any, ...]], workers: int,
+                   threads: bool=False) -> Iterator[Any]:
+    with (ThreadPoolExecutor if threads else ProcessPoolExecutor)(max_workers=workers) as executor:
+        pending = deque()
+        try:
+            for args in tasks:
+                try:
+                    future = executor.submit(func, *args)
+                except BrokenExecutor:
+                    future = None
+                pending.append((future, args))
+                if len(pending) >= workers * 2:
+                    yield _task_result(func, *pending.popleft())
+            while pending:
+                yield _task_result(func, *pending.popleft())
+        finally:
+            for future, args in pending:
+                if future is not None:
+                    future.cancel()
+
+
+def _task_result(func: Callable[..., Any], future: Any, args: Tuple[Any, ...]) -> Any:
+    if future is None:
+        return func(*args)
+    try:
+        return future.result()
+    except _POOL_ERRORS:
+        return func(*args)
+
+
+def _registered(cls: type) -> bool:
+    return any(base.__dict__.get('registry') for base in cls.__mro__)
+
+
+def _decode_lines(decoder: Decoder, lines: Iterable[Union[str, bytes]], first: int, clazz: type=None) -> Iterator[Any]:
+    for number, line in enumerate(lines, first):
+        if isinstance(line, bytes) and not isinstance(decoder, BytesDecoder):
+            line = line.decode(decoder.encoding)
+        if not line.strip():
+            continue
+        try:
+            yield decoder.decode(line) if clazz is None else decoder.decode(line, clazz)
+        except JsoneaseDecodeError as e:
+            raise JsoneaseDecodeError(e.s, e.pos, e.msg, (number + e.origin[0] - 1, e.origin[1]))
+
+
+def _decode_batch(lines: List[Union[str, bytes]], first: int, encoding: str, cls: Type[Decoder], clazz: type) -> List[Any]:
+    decoder = _instance(cls, encoding) if clazz is None else _instance(CustomDecoder, encoding)
+    return list(_decode_lines(decoder, lines, first, clazz))
+
+
+def _free_threaded() -> bool:
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+def _encode_items(items: List[Any], pairs: bool, cls: Type[Encoder], args: Tuple[Any, ...], accelerated: bool) -> str:
+    encoder = _instance(cls, *args, accelerated=True) if accelerated else _instance(cls, *args)
+    inner = encoder.indent
+    sep = encoder.item_sep + ' ' * inner
+    if pairs:
+        key_sep = encoder.key_sep
+        return sep.join([encoder.encode_str(key) + key_sep + encoder.encode(value, inner) for key, value in items])
+    return sep.join([encoder.encode(item, inner) for item in items])
+
+
+def _splittable(encoder: Encoder, obj: Any) -> bool:
+    pairs = type(obj) is dict
+    return (isinstance(encoder, BasicEncoder) and (pairs or type(obj) is list) and len(obj) > 0
+            and encoder.dispatch.get(type(obj)) is (BasicEncoder.iter_dict if pairs else BasicEncoder.iter_list)
+            and not (pairs and not all(type(key) is str for key in obj)))
+
+
+def _encode_parallel(encoder: Encoder, obj: Union[list, dict], cls: Type[Encoder], args: Tuple[Any, ...],
+                     accelerated: bool, workers: int, batch_size: int) -> str:
+    pairs = type(obj) is dict
+    if batch_size < 1 or len(obj) <= batch_size or not _splittable(encoder, obj):
+        return encoder.encode(obj)
+    tasks = ((batch, pairs, cls, args, accelerated) for batch in _iter_batches(obj.items() if pairs else obj, batch_size))
+    pad = ' ' * encoder.indent
+    parts = _iter_parallel(_encode_items, tasks, workers, _free_threaded() or _registered(cls))
+    return ''.join(('{' if pairs else '[', encoder.eol, pad, (encoder.item_sep + pad).join(parts), encoder.eol,
+                    '}' if pairs else ']'))
+
+
+def _decode_elements(s: str, cls: Type[Decoder], args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> List[Any]:
+    return _instance(cls, *args, **kwargs).scan_elements(s)
+
+
+def _decode_parallel(decoder: Decoder, s: str, clazz: type, cls: Type[Decoder], args: Tuple[Any, ...],
+                     kwargs: Dict[str, Any], workers: int, chunk_size: int) -> Any:
+    split = None
+    if 'max_depth' in kwargs:
+        kwargs = dict(kwargs, max_depth=kwargs['max_depth'] - 1)
+    if (isinstance(decoder, BasicDecoder) and isinstance(s, str) and len(s) > chunk_size > 0
+            and kwargs.get('max_depth', 0) >= 0):
+        pos = decoder.skip_whitespace(s, decoder.utf8_bom_re.match(s).end())
+        if s[pos: pos + 1] == '[':
+            split = decoder.split_array(s, pos, chunk_size)
+    if split is None or len(split[0]) < 2 or decoder.skip_whitespace(s, split[1]) != len(s):
+        return decoder.decode(s) if clazz is None else decoder.decode(s, clazz)
+    tasks = ((s[start: end], cls, args, kwargs) for start, end in split[0])
+    values = []
+    try:
+        for part in _iter_parallel(_decode_elements, tasks, workers, _free_threaded()):
+            values.extend(part)
+    except (JsoneaseDecodeError, IndexError):
+        return decoder.decode(s) if clazz is None else decoder.decode(s, clazz)
+    obj = decoder.finish_document(decoder.finish_array(values))
+    return obj if clazz is None else decoder.customize(obj, clazz)
+
+
+def _encode_batch(objs: List[Any], encoding: str, cls: Type[Encoder]) -> str:
+    encoder = _instance(cls, encoding)
+    return ''.join([encoder.encode(obj) + '\n' for obj in objs])
+
+
+def load_lines(fp: Iterable[Union[str, bytes]], encoding: str=JSON_ENCODING, cls: Type[Decoder]=CustomDecoder,
+               clazz: type=None, workers: int=None, batch_size: int=1000) -> Iterator[Any]:
+    if not workers or workers < 2:
+        yield from _decode_lines(_instance(cls, encoding) if clazz is None else _instance(CustomDecoder, encoding),
+                                 fp, 1, clazz)
+        return
+    tasks = ((batch, i * batch_size + 1, encoding, cls, clazz) for i, batch in enumerate(_iter_batches(fp, batch_size)))
+    for objs in _iter_parallel(_decode_batch, tasks, workers, _free_threaded()):
+        yield from objs
+
+
+def dump_lines(objs: Iterable[Any], fp: TextIO, encoding: str=JSON_ENCODING, cls: Type[Encoder]=CustomEncoder,
+               workers: int=None, batch_size: int=1000):
+    if not workers or workers < 2:
+        encoder = _instance(cls, encoding)
+        for obj in objs:
+            fp.write(encoder.encode(obj))
+            fp.write('\n')
+        return
+    tasks = ((batch, encoding, cls) for batch in _iter_batches(objs, batch_size))
+    for chunk in _iter_parallel(_encode_batch, tasks, workers, _free_threaded() or _registered(cls)):
+        fp.write(chunk)
+
+
+def _iter_chunks(source: Any, chunk_size: int) -> Iterator[Union[str, bytes]]:
+    if isinstance(source, (str, bytes, bytearray, memoryview)):
+        yield source
+    elif hasattr(source, 'read'):
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    else:
+        yield from source
+
+
+def iterparse(source: Any, encoding: str=JSON_ENCODING, cls: Type[Decoder]=CustomDecoder,
+              chunk_size: int=65536) -> Iterator[Tuple[str, str, Any]]:
+    return _iter_events(StreamDecoder(encoding, _instance(cls, encoding)), source, chunk_size)
+
+
+def _iter_events(parser: StreamDecoder, source: Any, chunk_size: int) -> Iterator[Tuple[str, str, Any]]:
+    for chunk in _iter_chunks(source, chunk_size):
+        parser.feed(chunk)
+        yield from parser
+    parser.close()
+    yield from parser
+
+
+async def async_load(reader: Any, encoding: str=JSON_ENCODING, cls: Type[Decoder]=CustomDecoder, clazz: type=None,
+                     chunk_size: int=65536) -> Any:
+    decoder = _instance(CustomDecoder if clazz is not None else cls, encoding)
+    parser = StreamDecoder(encoding, decoder)
+    builder = ObjectBuilder(decoder)
+    while True:
+        chunk = await reader.read(chunk_size)
+        if not chunk:
+            break
+        parser.feed(chunk)
+        for path, event, value in parser:
+            builder.event(event, value)
+        await asyncio.sleep(0)
+    parser.close()
+    for path, event, value in parser:
+        builder.event(event, value)
+    return builder.value if clazz is None else decoder.customize(builder.value, clazz)
+
+
+async def async_dump(obj: Any, writer: Any, encoding: str=JSON_ENCODING, cls: Type[Encoder]=CustomEncoder,
+                     indent: int=None, chunk_size: int=65536):
+    _encoder = _instance(cls, encoding) if indent is None else _instance(cls, encoding, indent)
+    chunks, size = [], 0
+    for chunk in _encoder.iterencode(obj):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= chunk_size:
+            writer.write(''.join(chunks).encode(encoding))
+            chunks, size = [], 0
+            await writer.drain()
+            await asyncio.sleep(0)
+    if chunks:
+        writer.write(''.join(chunks).encode(encoding))
+        await writer.drain()
+
+
+def iter_items(source: Any, prefix: str='', encoding: str=JSON_ENCODING, cls: Type[Decoder]=CustomDecoder,
+               chunk_size: int=65536) -> Iterator[Any]:
+    prefix = prefix + '.item' if prefix else 'item'
+    decoder = _instance(cls, encoding)
+    parser = StreamDecoder(encoding, decoder)
+    builder = None
+    for path, event, value in _iter_events(parser, source, chunk_size):
+        if builder is None:
+            if path != prefix or event in ('map_key', 'end_map', 'end_array'):
+                continue
+            builder = ObjectBuilder(decoder)
+        if builder.event(event, value):
+            yield builder.value
+            builder = None
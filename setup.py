@@ -2,14 +2,15 @@
 # coding: utf-8
 
 
+import sys
 import platform
 
 try:
-    from setuptools import setup
+    from setuptools import setup, Extension
 except ImportError:
-    from distutils.core import setup
+    from distutils.core import setup, Extension
 
-if platform.python_version_tuple() < ('3', '6') or platform.python_implementation() != 'CPython':
+if sys.version_info < (3, 6) or platform.python_implementation() != 'CPython':
     raise RuntimeError('CPython version 3.6+ is required.')
 
 import jsonease
@@ -22,6 +23,7 @@ setup(name='jsonease',
       author_email='yifan_wang@silanis.com',
       url='https://github.com/wangyifan1985/jsonease',
       py_modules=['jsonease'],
+      ext_modules=[Extension('_jsonease_speedups', ['_jsonease_speedups.c'], optional=True)],
       license='MIT',
       platforms='any',
       classifiers=['Development Status :: 4 - Beta',
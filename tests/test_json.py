@@ -1,13 +1,26 @@
 #!/usr/bin/env python
 # coding: utf-8
 
+import os
+import sys
+import gc
+import weakref
+import asyncio
+import threading
+import multiprocessing
 import timeit
+import tempfile
+from array import array
+from decimal import Decimal
 import uuid
 from collections import deque
 from datetime import timedelta, timezone
-from datetime import datetime
+from datetime import datetime, date, time as dt_time
 from collections import UserList, UserDict
+from io import StringIO, BytesIO
 from unittest import TestCase
+from typing import List, Dict, Optional, NamedTuple
+from dataclasses import dataclass, field
 import jsonease as sj
 
 
@@ -41,6 +54,50 @@ class Student(object):
         Student.pass_line = pass_line
 
 
+class Point(object):
+    __slots__ = ('x', 'y')
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+class Tagged(object):
+    tag = 'v1'
+
+    def __init__(self, i):
+        self.i = i
+        self.label = '%s-%d' % (self.tag, i)
+
+
+class Stateful(object):
+    def __init__(self, value):
+        self.value = value
+
+    def __getstate__(self):
+        return {'state': self.value}
+
+
+class Address(object):
+    def __init__(self, city: str, zip_code: Optional[str]=None):
+        self.city = city
+        self.zip_code = zip_code
+
+
+class Pair(NamedTuple):
+    x: int
+    y: int = 0
+
+
+@dataclass
+class Person(object):
+    name: str
+    born: date
+    addresses: List[Address]
+    pairs: Dict[str, Pair] = field(default_factory=dict)
+    parent: Optional['Person'] = None
+
+
 class TestJson(TestCase):
 
     def test_loads_null(self):
@@ -99,6 +156,14 @@ class TestJson(TestCase):
         sample = ' "l  sk \\n jfds"  '
         print(sj.loads(sample))
 
+    def test_loads_string_escapes(self):
+        samples = {'"plain"': 'plain', '""': '', '"a\\nb\\t\\/\\"q\\\\"': 'a\nb\t/"q\\',
+                   '"\\u00e9\\u7890"': '\u00e9\u7890', '"x\\ud83d\\ude00y"': 'x\U0001F600y'}
+        for s, v in samples.items():
+            self.assertEqual(v, sj.loads(s, cls=sj.BasicDecoder))
+        for s in ('"abc', '"a\\x"', '"a\\u12"', '"a\\'):
+            self.assertRaises(sj.JsoneaseDecodeError, sj.loads, s, cls=sj.BasicDecoder)
+
     def test_loads_perf_string_1(self):
         samples = ('  "  dslddjjjjjjjjj\\u7890jjjjjjjjjjjjjjjs"', )
         for s in samples:
@@ -126,6 +191,174 @@ class TestJson(TestCase):
         sample = '  { "haha": 123, "dslkjf": false, "yifan": true, "h\\naha1": null , "haha3": [[[[[[null]]]]],[],[],[],[]     ], "haha4:": {"haha":{"haha":{"haha2:":[null, true, -0.334, "haha"]}}}}   '
         self.assertEqual(dict, type(sj.loads(sample)))
 
+    def test_loads_stack(self):
+        samples = ['null', '  -3.45  ', '[[[[[[]]]]],[],[],[],[]     ]',
+                   '[ null , false , ["ldskfjls", null, [], [[]]],  true, "  dslddjjjjjjjjj\\u7890jjjjjjjjjjjjjjjs"  , 123, -12312, -0.111 ]   ',
+                   '  { "haha": 123, "dslkjf": false, "yifan": true, "h\\naha1": null , "haha3": [[[[[[null]]]]],[],[],[],[]     ], "haha4:": {"haha":{"haha":{"haha2:":[null, true, -0.334, "haha"]}}}}   ']
+        for s in samples:
+            self.assertEqual(sj.loads(s, cls=sj.BasicDecoder), sj.loads(s, cls=sj.StackDecoder))
+        for s in ('[1, 2 3]', '{"a": 1 "b": 2}', '{"a" 1}', '[1, 2,]'):
+            with self.assertRaises(sj.JsoneaseDecodeError) as basic:
+                sj.loads(s, cls=sj.BasicDecoder)
+            with self.assertRaises(sj.JsoneaseDecodeError) as stack:
+                sj.loads(s, cls=sj.StackDecoder)
+            self.assertEqual(str(basic.exception), str(stack.exception))
+
+    def test_loads_stack_depth(self):
+        self.assertEqual(list, type(sj.loads('[' * 5000 + ']' * 5000, cls=sj.StackDecoder)))
+        self.assertRaises(sj.JsoneaseDecodeError, sj.StackDecoder(max_depth=10).decode, '[' * 11 + ']' * 11)
+        self.assertRaises(sj.JsoneaseDecodeError, sj.loads, '[[1, 2]', cls=sj.StackDecoder)
+        self.assertEqual([[[1]]], sj.loads('[[[1]]]', cls=sj.StackDecoder, max_depth=3))
+        self.assertRaises(sj.JsoneaseDecodeError, sj.loads, '[[[1]]]', cls=sj.StackDecoder, max_depth=2)
+        self.assertRaises(sj.JsoneaseDecodeError, sj.load, StringIO('[[1]]'), cls=sj.TokenDecoder, max_depth=1)
+        for cls in (sj.CustomDecoder, sj.BasicDecoder, sj.AdvancedDecoder, sj.StackDecoder):
+            self.assertEqual([[{'a': [1]}]], sj.loads('[[{"a": [1]}]]', cls=cls, max_depth=4))
+            with self.assertRaises(sj.JsoneaseDecodeError) as cm:
+                sj.loads('[[{"a": "[{", "b": [1]}]]', cls=cls, max_depth=3)
+            self.assertEqual(19, cm.exception.pos)
+        self.assertEqual([1], sj.loads('[1]', max_depth=5))
+        self.assertEqual(2, sj.loads('[[1, 2]]', clazz=List[Point], max_depth=2)[0].y)
+        self.assertRaises(sj.JsoneaseDecodeError, sj.loads, '[[1, 2]]', clazz=List[Point], max_depth=1)
+        self.assertRaises(sj.JsoneaseDecodeError, sj.loads, '[' * 5000 + ']' * 5000, max_depth=100, accelerated=True)
+        text = sj.dumps([[i, [i]] for i in range(100)])
+        self.assertEqual(sj.loads(text), sj.loads(text, cls=sj.StackDecoder, max_depth=3, parallel=2, chunk_size=50))
+        self.assertEqual(sj.loads(text), sj.loads(text, max_depth=3, parallel=2, chunk_size=50))
+        for depth in (0, 2):
+            with self.assertRaises(sj.JsoneaseDecodeError):
+                sj.loads(text, cls=sj.StackDecoder, max_depth=depth, parallel=2, chunk_size=50)
+
+    def test_loads_token(self):
+        samples = ['null', '  -3.45  ', '  "  dslddjjjjjjjjj\\u7890jjjjjjjjjjjjjjjs"', '[[[[[[]]]]],[],[],[],[]     ]',
+                   '[ null , false , ["ldskfjls", null, [], [[]]],  true, "  dslddjjjjjjjjj\\u7890jjjjjjjjjjjjjjjs"  , 123, -12312, -0.111 ]   ',
+                   '  { "haha": 123, "dslkjf": false, "yifan": true, "h\\naha1": null , "haha3": [[[[[[null]]]]],[],[],[],[]     ], "haha4:": {"haha":{"haha":{"haha2:":[null, true, -0.334, "haha"]}}}}   ']
+        for s in samples:
+            self.assertEqual(sj.loads(s, cls=sj.BasicDecoder), sj.loads(s, cls=sj.TokenDecoder))
+        for s in ('nullsdkflsdf', 'truefalse', '--0.123', '[1, 2 3]', '{"a" 1}', '[1, 2,]', '{abc": 1}', '[1, 2'):
+            self.assertRaises(sj.JsoneaseDecodeError, sj.loads, s, cls=sj.TokenDecoder)
+        for s in ('[1, 2 3]', '{"a": 1 "b": 2}', '{"a" 1}', '[1, 2,]', '{.', '{"a": 1,}', '{,}', '{a: 1}', ' ', '[',
+                  '{"a":', '[1', '{"a": 1', '{"a"', '\n\n  [1,\n  x]', '[nul]', '{"a": tru}'):
+            with self.assertRaises(sj.JsoneaseDecodeError) as stack:
+                sj.loads(s, cls=sj.StackDecoder)
+            with self.assertRaises(sj.JsoneaseDecodeError) as token:
+                sj.loads(s, cls=sj.TokenDecoder)
+            self.assertEqual(str(stack.exception), str(token.exception))
+
+    def test_loads_bytes(self):
+        samples = ['null', '  -3.45  ', '  "  dslddjjjjjjjjj\\u7890jjjjjjjjjjjjjjjs"', '[[[[[[]]]]],[],[],[],[]     ]',
+                   '\ufeff[ null , false , ["ld\u00e9\\ud83d\\ude00", null, [], [[]]],  true, 123, -12312, -0.111 ]   ',
+                   '  { "haha": 123, "h\\naha1": null , "\u00e9t\u00e9": [[[[[[null]]]]],[],[]     ], "haha4:": {"haha":{"haha2:":[null, -0.334, "haha"]}}}   ']
+        for s in samples:
+            expected = sj.loads(s.lstrip('\ufeff'), cls=sj.BasicDecoder)
+            for b in (s.encode('utf-8'), bytearray(s.encode('utf-8')), memoryview(s.encode('utf-8'))):
+                self.assertEqual(expected, sj.loads(b, cls=sj.BytesDecoder))
+        for s in (b'nullsdkflsdf', b'--0.123', b'[1, 2 3]', b'{"a" 1}', b'[1, 2,]', b'[1, 2', b'["\xff"]', '[]'):
+            self.assertRaises(sj.JsoneaseDecodeError, sj.loads, s, cls=sj.BytesDecoder)
+        with self.assertRaises(sj.JsoneaseDecodeError) as cm:
+            sj.loads('["\u00e9\u00e9",\n "\u00e9", x]'.encode('utf-8'), cls=sj.BytesDecoder)
+        self.assertEqual(('2', '7'), cm.exception.linecol(cm.exception.s, cm.exception.pos))
+        with self.assertRaises(sj.JsoneaseDecodeError) as cm:
+            sj.loads(b'', cls=sj.BytesDecoder)
+        self.assertEqual('Only "bytes" type is acceptable: 1 : 1', str(cm.exception))
+        for cls, samples in ((sj.BasicDecoder, ('[1, 2 3]', '{"a": 1 "b": 2}', '{"a" 1}', '{.', '{"a": 1,}', '{a: 1}',
+                                                '{\n "é":\n  [1,\n "ü" 2]}', '["é",\r\n\r\n\r\n  x]',
+                                                '[\n\n\n "é\\q"]', '["\U0001F600", \n\n\n "\U0001F600" x]')),
+                             (sj.StackDecoder, (' ', '[', '{"a":', '[1', '{"a": 1', '\n\n\n  [éé,\n "é"'))):
+            for s in samples:
+                with self.assertRaises(sj.JsoneaseDecodeError) as text:
+                    sj.loads(s, cls=cls)
+                with self.assertRaises(sj.JsoneaseDecodeError) as raw:
+                    sj.loads(s.encode('utf-8'), cls=sj.BytesDecoder)
+                self.assertEqual(str(text.exception), str(raw.exception))
+
+    def test_load_lazy(self):
+        sample = {'meta': {'n\u00e9': 1, 'tags': ['a', 'b\\"']}, 'rows': [{'id': i, 'v': [i, {'w': None}]} for i in range(50)], 'e': []}
+        fd, path = tempfile.mkstemp()
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as fp:
+                fp.write(sj.dumps(sample, indent=2))
+            with sj.load_lazy(path) as lazy:
+                self.assertIsInstance(lazy, sj.LazyObject)
+                self.assertEqual(['meta', 'rows', 'e'], list(lazy))
+                self.assertIsInstance(lazy['rows'], sj.LazyArray)
+                self.assertEqual({'w': None}, lazy['rows'][42]['v'][1])
+                self.assertEqual(['a', 'b\\"'], lazy['meta']['tags'])
+                self.assertEqual(sample['rows'][-3:], lazy['rows'][-3:])
+                self.assertRaises(IndexError, lazy['rows'].__getitem__, -51)
+                self.assertEqual(sample, lazy)
+                self.assertEqual(sample, lazy.decode())
+                rows = lazy['rows']
+            self.assertTrue(lazy.document.buffer.closed)
+            self.assertRaises(ValueError, rows.decode)
+            with open(path, 'w') as fp:
+                fp.write('{"a": [1, 2], "b": [1 2]}')
+            with sj.load_lazy(path) as lazy:
+                self.assertEqual([1, 2], lazy['a'])
+                self.assertRaises(sj.JsoneaseDecodeError, len, lazy['b'])
+            with open(path, 'w') as fp:
+                fp.write('{"meta": {"n": 1}, "rows": [[1, 2], {"a": [3')
+            with sj.load_lazy(path) as lazy:
+                self.assertEqual(1, lazy['meta']['n'])
+                self.assertEqual([1, 2], lazy['rows'][0])
+                self.assertRaises(sj.JsoneaseDecodeError, len, lazy)
+            for s in ('[1, 2', '["abc]', '[1] x', '{"a": [}', '{"a": [1]} x'):
+                with open(path, 'w') as fp:
+                    fp.write(s)
+                with sj.load_lazy(path) as lazy:
+                    self.assertRaises(sj.JsoneaseDecodeError, len, lazy)
+                    self.assertRaises(sj.JsoneaseDecodeError, lazy.decode)
+            for s in ('"abc"', ' 12 ', '"abc'):
+                with open(path, 'w') as fp:
+                    fp.write(s)
+                try:
+                    self.assertEqual(sj.loads(s), sj.load_lazy(path))
+                except sj.JsoneaseDecodeError:
+                    self.assertRaises(sj.JsoneaseDecodeError, sj.loads, s)
+            with sj.LazyDocument(b'[1, [2]]') as document:
+                self.assertEqual([2], document.root()[1])
+        finally:
+            os.remove(path)
+
+    def test_loads_numbers(self):
+        sample = '{"price": 19.99, "qty": 3, "v": [1.5, 2, -3e2], "m": [1, "a"], "b": [true, 1.0], "e": [], "big": [9007199254740993, 1.0]}'
+        for cls in (sj.BasicDecoder, sj.StackDecoder, sj.TokenDecoder, sj.CustomDecoder):
+            self.assertEqual(sj.loads(sample, cls=sj.BasicDecoder), cls(sj.JSON_ENCODING).decode(sample))
+            obj = cls(sj.JSON_ENCODING, decimal=True).decode(sample)
+            self.assertEqual((Decimal('19.99'), 3), (obj['price'], obj['qty']))
+            self.assertEqual([Decimal('1.5'), 2, Decimal('-3e2')], obj['v'])
+            obj = cls(sj.JSON_ENCODING, numeric_arrays=True).decode(sample)
+            self.assertEqual(array('d', [1.5, 2.0, -300.0]), obj['v'])
+            self.assertEqual(([1, 'a'], [True, 1.0], [], [9007199254740993, 1.0]), (obj['m'], obj['b'], obj['e'], obj['big']))
+        obj = sj.BytesDecoder(decimal=True, numeric_arrays=True).decode(sample.encode('utf-8'))
+        self.assertEqual((Decimal('19.99'), [Decimal('1.5'), 2, Decimal('-3e2')]), (obj['price'], obj['v']))
+        self.assertEqual('{"price": 19.99, "v": [1.5, 2.0]}', sj.dumps({'price': Decimal('19.99'), 'v': array('d', [1.5, 2])}))
+        self.assertEqual(Decimal('19.99'), sj.loads(sample, decimal=True)['price'])
+        self.assertEqual(array('d', [1.5, 2.0, -300.0]), sj.loads(sample, numeric_arrays=True)['v'])
+        self.assertEqual(Decimal('0.1'), sj.load(StringIO('[0.1]'), cls=sj.TokenDecoder, decimal=True)[0])
+        text = sj.dumps([[i / 4, i] for i in range(100)])
+        self.assertEqual([array('d', [i / 4, i]) for i in range(100)],
+                         sj.loads(text, cls=sj.StackDecoder, numeric_arrays=True, parallel=2, chunk_size=50))
+        for s in ('-', '1.', '01', '1e', '.5'):
+            self.assertRaises(sj.JsoneaseDecodeError, sj.loads, s, cls=sj.BasicDecoder)
+
+    def test_loads_perf_token(self):
+        samples = ['[ null , false , ["ldskfjls", null, [], [[]]],  true, "  dslddjjjjjjjjj\\u7890jjjjjjjjjjjjjjjs"  , 123, -12312, -0.111 ]   ',
+                   '  { "haha": 123, "dslkjf": false, "yifan": true, "h\\naha1": null , "haha3": [[[[[[null]]]]],[],[],[],[]     ], "haha4:": {"haha":{"haha":{"haha2:":[null, true, -0.334, "haha"]}}}}   ']
+        for s in samples:
+            for cls in (sj.BasicDecoder, sj.TokenDecoder):
+                decoder = cls(sj.JSON_ENCODING)
+                print(cls.__name__, timeit.timeit(lambda: decoder.decode(s), number=1000))
+
+    def test_loads_key_memo(self):
+        sample = '[{"id": 1, "n\\u00e9": "a"}, {"id": 2, "n\\u00e9": "b"}, {"id": 3, "n\\u00e9": "c"}]'
+        for cls in (sj.BasicDecoder, sj.StackDecoder, sj.TokenDecoder, sj.CustomDecoder):
+            decoder = cls(sj.JSON_ENCODING)
+            obj = decoder.decode(sample)
+            self.assertEqual([{'id': 1, 'n\u00e9': 'a'}, {'id': 2, 'n\u00e9': 'b'}, {'id': 3, 'n\u00e9': 'c'}], obj)
+            self.assertIs(*[list(o)[0] for o in obj[0:2]])
+            self.assertEqual({}, decoder.memo)
+        obj = sj.BasicDecoder(sj.JSON_ENCODING, intern_keys=True).decode('{"some_long_key_name": 1}')
+        self.assertIs(sys.intern('some_long_key_name'), list(obj)[0])
+
     def test_dumps_null(self):
         sample = None
         self.assertEqual('null', sj.dumps(sample))
@@ -155,6 +388,35 @@ class TestJson(TestCase):
         for k, v in samples.items():
             self.assertEqual(k, sj.dumps(v))
 
+    def test_iterencode(self):
+        sample = {"def": [False, {'haha': 123, "toto": [123, 45, None, [False, True]]}], '123': None, '4334': []}
+        for cls in (sj.BasicEncoder, sj.AdvancedEncoder, sj.CustomEncoder):
+            chunks = list(cls(sj.JSON_ENCODING).iterencode(sample))
+            self.assertTrue(len(chunks) > 1)
+            self.assertEqual(sj.dumps(sample, cls=cls), ''.join(chunks))
+
+    def test_dump_stream(self):
+        sample = [UserDict({'haha': 2+3j, 'toto': [False, {'nini': 'xixi'}]}), deque([1, 2.5, 'x'])]
+        fp = StringIO()
+        sj.dump(sample, fp)
+        self.assertEqual(sj.dumps(sample), fp.getvalue())
+        for options in ({}, {'indent': 2}):
+            fp = StringIO()
+            sj.dump(sample + [{'a': [1, None]}], fp, accelerated=True, **options)
+            self.assertEqual(sj.dumps(sample + [{'a': [1, None]}], **options), fp.getvalue())
+        students = [Student('s%d' % i, i % 2 == 0) for i in range(50)]
+        samples = [students, {'k%d' % i: [i, {'s': s}] for i, s in enumerate(students)}, [], {}, 'x']
+        samples += [sj.loads(sj.dumps(sample)) for sample in samples[:2]]
+        for sample in samples:
+            for cls in (sj.CustomEncoder, sj.BasicEncoder) if sample not in samples[:2] else (sj.CustomEncoder,):
+                for options in ({}, {'indent': 2}, {'accelerated': True}):
+                    writes = []
+                    fp = StringIO()
+                    fp.write = lambda chunk, write=fp.write: writes.append(chunk) or write(chunk)
+                    sj.dump(sample, fp, cls=cls, chunk_size=200, **options)
+                    self.assertEqual(sj.dumps(sample, cls=cls, **options), fp.getvalue())
+                    self.assertLessEqual(len(writes), len(fp.getvalue()) // 200 + 3)
+
     def test_dumps_indented(self):
         sample0 = {"def": [False, {'haha': 123, "toto": [123, 45, None, [False, True]]}], '123': None, '4334': []}
         sample1 = [False, {'haha': 123, "toto": [123, 45, None, [False, True]]}]
@@ -188,6 +450,109 @@ class TestJson(TestCase):
                          '        ]\r\n            }\r\n        ]\r\n    },\r\n    true\r\n]',
                          sj.dumps(sample5, indent=4))
 
+    def test_dumps_indented_single_pass(self):
+        sample = [False, {'haha': 123, 'toto': [False, {'nini': 'xixi', 'c': 2+3j}]}, [], {}, True]
+        for indent in (0, 2, 4):
+            self.assertEqual(sj.formats(sj.dumps(sample), indent=indent), sj.dumps(sample, indent=indent))
+        fp = StringIO()
+        sj.dump(sample, fp, indent=4)
+        self.assertEqual(sj.dumps(sample, indent=4), fp.getvalue())
+        encoder = sj.BasicEncoder(sj.JSON_ENCODING, indent=1, item_sep=',\n', key_sep=':', eol='\n')
+        self.assertEqual('{\n "a":[\n  1,\n  2\n ]\n}', encoder.encode({'a': [1, 2]}))
+
+    def test_dumps_parallel(self):
+        students = [Student('s%d' % i, i % 2 == 0) for i in range(30)]
+        samples = [students, {'k%d' % i: [i, {'s': student}] for i, student in enumerate(students)}, list(range(5))]
+        for sample in samples:
+            for options in ({}, {'indent': 2}, {'accelerated': True}):
+                self.assertEqual(sj.dumps(sample, **options), sj.dumps(sample, parallel=2, batch_size=7, **options))
+        self.assertEqual('{"1": 1}', sj.dumps({'1': 1}, parallel=2, batch_size=0))
+        with self.assertRaises(sj.JsoneaseEncodeError):
+            sj.dumps([1] * 10 + [1j], cls=sj.BasicEncoder, parallel=2, batch_size=4)
+
+    def test_dumps_parallel_spawn(self):
+        class Local(object):
+            def __init__(self, i):
+                self.i = i
+
+        method = multiprocessing.get_start_method()
+        multiprocessing.set_start_method('spawn', force=True)
+        sj.register(Point, lambda p: [p.x, p.y])
+        try:
+            samples = [[Point(i, -i) for i in range(20)], [Local(i) for i in range(20)], list(range(20))]
+            for sample in samples:
+                self.assertEqual(sj.dumps(sample), sj.dumps(sample, parallel=2, batch_size=5))
+        finally:
+            sj.unregister(Point)
+            multiprocessing.set_start_method(method, force=True)
+
+    def test_dumps_parallel_invalidate(self):
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            return
+        method = multiprocessing.get_start_method()
+        multiprocessing.set_start_method('fork', force=True)
+        sample = [Tagged(i) for i in range(20)]
+        try:
+            self.assertEqual(sj.dumps(sample), sj.dumps(sample, parallel=2, batch_size=5))
+            Tagged.tag = 'v2'
+            Tagged.extra = True
+            sj.invalidate(Tagged)
+            self.assertIn('"tag": "v2", "extra": true', sj.dumps(sample))
+            self.assertEqual(sj.dumps(sample), sj.dumps(sample, parallel=2, batch_size=5))
+        finally:
+            Tagged.tag = 'v1'
+            del Tagged.extra
+            sj.invalidate(Tagged)
+            multiprocessing.set_start_method(method, force=True)
+
+    def test_loads_parallel(self):
+        text = sj.dumps([{'i': i, 's': 'a,]}"\\x' * (i % 3), 'l': [i, [None]]} if i % 4 else i / 2 for i in range(60)])
+        for cls in (sj.BasicDecoder, sj.StackDecoder, sj.AdvancedDecoder, sj.CustomDecoder):
+            self.assertEqual(sj.loads(text, cls=cls), sj.loads(text, cls=cls, parallel=2, chunk_size=100))
+        students = [Student('s%d' % i, i % 2 == 0) for i in range(30)]
+        result = sj.loads(sj.dumps(students), clazz=List[Student], parallel=2, chunk_size=50)
+        self.assertEqual([s.name for s in students], [s.name for s in result])
+        self.assertEqual([1, 2], sj.loads(' [1, 2] ', parallel=2, chunk_size=0))
+        scalars = sj.dumps([i if i % 3 else 's,]"{\\%d' % i for i in range(300)])
+        slices, end = sj.BasicDecoder(sj.JSON_ENCODING).split_array(scalars, 0, 100)
+        self.assertEqual((len(scalars), True), (end, len(slices) > 10))
+        self.assertEqual(sj.loads(scalars), sj.loads(scalars, parallel=2, chunk_size=100))
+        for bad in (text[:-1] + ',]', text[:-1] + '}', text[:500] + '\n x' + text[500:], text + ','):
+            with self.assertRaises(sj.JsoneaseDecodeError) as serial:
+                sj.loads(bad)
+            with self.assertRaises(sj.JsoneaseDecodeError) as parallel:
+                sj.loads(bad, parallel=2, chunk_size=100)
+            self.assertEqual(str(serial.exception), str(parallel.exception))
+
+    def test_parallel_fresh_workers(self):
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            return
+        method = multiprocessing.get_start_method()
+        multiprocessing.set_start_method('fork', force=True)
+        text = ''.join('{"i": %d}\n' % i for i in range(20))
+        try:
+            self.assertEqual('v1-3', list(sj.load_lines(StringIO(text), clazz=Tagged, workers=2, batch_size=5))[3].label)
+            Tagged.tag = 'v2'
+            self.assertEqual([t.label for t in sj.load_lines(StringIO(text), clazz=Tagged)],
+                             [t.label for t in sj.load_lines(StringIO(text), clazz=Tagged, workers=2, batch_size=5)])
+        finally:
+            Tagged.tag = 'v1'
+            multiprocessing.set_start_method(method, force=True)
+
+    def test_minify(self):
+        sample = ' {"a" : [ 1 , 2.50e3, "x \\" y\\\\" ,[ ], { } ] , "b":null,\r\n"c":true}\n'
+        self.assertEqual('{"a":[1,2.50e3,"x \\" y\\\\",[],{}],"b":null,"c":true}', sj.minify(sample))
+        self.assertEqual(sj.dumps(sj.loads(sample), cls=sj.BasicEncoder).replace(', ', ',').replace(': ', ':'),
+                         sj.minify(sj.formats(sj.minify(sample).replace('2.50e3', '2500.0'))))
+        for s in ('[1, x]', '{"a": "abc', '[-]', ''):
+            self.assertRaises(sj.JsoneaseFormatError, sj.minify, s)
+        for s in ('[1 2]', '1 2', 'true false', '[1,,2]', '{}}', '[1,]', '{"a":1,}', '{"a" 1}', '{1:2}', '[1}', '[',
+                  ',', ' '):
+            self.assertRaises(sj.JsoneaseFormatError, sj.minify, s)
+        with self.assertRaises(sj.JsoneaseFormatError) as error:
+            sj.minify('[1,\n 2 3]')
+        self.assertEqual('Can not format json "array" string: 2 : 4', str(error.exception))
+
     def test_advanced_dumps(self):
         sample = UserList([False, 123, UserDict({}), 5+5j, UserDict({'haha': 2+3j, 'toto': [False, {'nini': 'xixi'}]}), True])
         self.assertEqual('[\r\n    false,\r\n    123,\r\n    {},\r\n    {\r\n        "real": 5.0,\r\n       '
@@ -223,6 +588,40 @@ class TestJson(TestCase):
         self.assertEqual({'haha': (2+3j), 'toto': [False, datetime(2017, 11, 20, 10, 53, 22, tzinfo=timezone(timedelta(-1, 68400)))]}, d)
         print(d)
 
+    def test_advanced_fields(self):
+        sample = '{"at": "2017-11-20", "days": ["2017-11-21", 3], "other": "2017-11-20", "n": {"at": "10:53"}}'
+        d = sj.loads(sample, cls=lambda encoding: sj.AdvancedDecoder(encoding, fields=['at', 'days']))
+        self.assertEqual({'at': date(2017, 11, 20), 'days': [date(2017, 11, 21), 3], 'other': '2017-11-20',
+                          'n': {'at': '10:53'}}, d)
+        decoder = sj.AdvancedDecoder(fields=['n.at', ('rows', 'at.x'), 'rows.id'])
+        sample = ('{"at": "2017-11-20", "n": {"at": "10:53", "id": "10:54"}, "rows": [{"at.x": "2017-11-22", '
+                  '"id": ["10:55", 1], "at": "10:56"}, [{"id": "10:57"}]]}')
+        expected = {'at': '2017-11-20', 'n': {'at': dt_time(10, 53), 'id': '10:54'},
+                    'rows': [{'at.x': date(2017, 11, 22), 'id': [dt_time(10, 55), 1], 'at': '10:56'},
+                             [{'id': dt_time(10, 57)}]]}
+        self.assertEqual(expected, decoder.decode(sample))
+        self.assertEqual(expected, sj.loads(sample, cls=lambda encoding: decoder, parallel=2, chunk_size=10))
+        self.assertEqual(expected, asyncio.run(self.read_async(sample, decoder)))
+        self.assertEqual(expected['rows'], list(sj.iter_items(sample, 'rows', cls=lambda encoding: sj.AdvancedDecoder(
+            encoding, fields=[('at.x',), 'id']))))
+        sample = '{"2017-11-20": "2017-11-20"}'
+        self.assertEqual({date(2017, 11, 20): date(2017, 11, 20)}, sj.AdvancedDecoder().decode(sample))
+        self.assertEqual({'2017-11-20': date(2017, 11, 20)}, sj.AdvancedDecoder(convert_keys=False).decode(sample))
+
+    @staticmethod
+    async def read_async(text, decoder):
+        reader = asyncio.StreamReader()
+        reader.feed_data(text.encode('utf-8'))
+        reader.feed_eof()
+        return await sj.async_load(reader, cls=lambda encoding: decoder, chunk_size=7)
+
+    def test_advanced_perf_sniff(self):
+        sample = sj.dumps([{'name': 'student %d' % i, 'comment': 'no comment', 'id': str(uuid.uuid4()),
+                            'born': '2001-01-01'} for i in range(100)])
+        for decoder in (sj.BasicDecoder(sj.JSON_ENCODING), sj.AdvancedDecoder(),
+                        sj.AdvancedDecoder(fields=['born'], convert_keys=False)):
+            print(type(decoder).__name__, timeit.timeit(lambda: decoder.decode(sample), number=100))
+
     def test_advanced_uuid(self):
         _uuid = uuid.uuid1()
         sample = deque([False, _uuid, 123, UserDict({}), 5+5j, UserDict({'haha': 2+3j, 'toto': [False, {'nini': 'xixi'}]}), True])
@@ -249,4 +648,408 @@ class TestJson(TestCase):
         a = sj.dumps(toto)
         py_a = sj.loads(a, clazz=Student)
         a2 = sj.dumps(py_a)
-        self.assertEqual(a, a2)
\ No newline at end of file
+        self.assertEqual(a, a2)
+
+    def test_custom_plans(self):
+        encoder = sj.CustomEncoder()
+        self.assertEqual('[{"x": 1, "y": 2}, {"x": 3, "y": 4}]', encoder.encode([Point(1, 2), Point(3, 4)]))
+        self.assertEqual('{"state": 5}', encoder.encode(Stateful(5)))
+        self.assertEqual('{"name": "toto", "score": 0, "passed": false, "pass_line": 60}', encoder.encode(Student('toto')))
+        self.assertIn(Student, encoder.plans)
+        Student.pass_line = 50
+        try:
+            encoder.invalidate(Student)
+            self.assertNotIn(Student, encoder.plans)
+            self.assertEqual('{"name": "toto", "score": 0, "passed": false, "pass_line": 50}', encoder.encode(Student('toto')))
+        finally:
+            Student.pass_line = 60
+        self.assertRaises(sj.JsoneaseEncodeError, encoder.encode, print)
+
+    def test_invalidate(self):
+        class Local(object):
+            def __init__(self, v):
+                self.v = v
+
+        encoder = sj.CustomEncoder()
+        self.assertEqual('{"v": 1}', sj.dumps(Local(1)))
+        self.assertEqual('{"v": 2}', encoder.encode(Local(2)))
+        self.assertIsInstance(encoder.plans, weakref.WeakKeyDictionary)
+        Local.w = 3
+        sj.invalidate(Local)
+        self.assertEqual('{"v": 1, "w": 3}', sj.dumps(Local(1)))
+        sj.invalidate()
+        encoder.invalidate(Local)
+        self.assertEqual(0, len(encoder.plans))
+        ref = weakref.ref(Local)
+        del Local
+        gc.collect()
+        self.assertIsNone(ref())
+
+        class Items(list):
+            pass
+
+        self.assertEqual('[1]', sj.dumps(Items([1]), cls=sj.BasicEncoder))
+        self.assertIn(Items, sj._default_encoder.dispatch)
+        sj.invalidate()
+        self.assertIn(list, sj._default_encoder.dispatch)
+        ref = weakref.ref(Items)
+        del Items
+        gc.collect()
+        self.assertIsNone(ref())
+
+    def test_instance_cache(self):
+        self.assertEqual(sj.dumps(Student('toto')), sj.dumps(Student('toto')))
+        encoder = sj._instance(sj.CustomEncoder, sj.JSON_ENCODING)
+        self.assertIs(encoder, sj._instance(sj.CustomEncoder, sj.JSON_ENCODING))
+        self.assertIn(Student, encoder.plans)
+        self.assertIsNot(encoder, sj._instance(sj.CustomEncoder, sj.JSON_ENCODING, 2))
+        Student.pass_line = 50
+        try:
+            self.assertEqual('{"name": "toto", "score": 0, "passed": false, "pass_line": 50}', sj.dumps(Student('toto')))
+        finally:
+            Student.pass_line = 60
+        self.assertEqual(Pair(3, 4), sj.loads('{"x": 3, "y": 4}', clazz=Pair))
+        self.assertIn(Pair, sj._instance(sj.CustomDecoder, sj.JSON_ENCODING).plans)
+        self.assertIs(sj._default_formatter, sj._instance(sj.DefaultFormatter, 0, 4, ',\r\n', ': ', '\r\n'))
+        for indent in range(sj.INSTANCE_CACHE_SIZE * 2):
+            sj.formats('[1]', indent=indent)
+            self.assertIs(encoder, sj._instance(sj.CustomEncoder, sj.JSON_ENCODING))
+        self.assertEqual(sj.INSTANCE_CACHE_SIZE, len(sj._instances))
+        self.assertIs(sj._default_formatter, sj._instance(sj.DefaultFormatter, 0, 4, ',\r\n', ': ', '\r\n'))
+        self.assertIs(sj._default_encoder, sj._instance(sj.BasicEncoder, sj.JSON_ENCODING))
+        self.assertIs(sj._default_decoder, sj._instance(sj.BasicDecoder, sj.JSON_ENCODING))
+        self.assertEqual([1], sj.loads(b'[1]', cls=lambda encoding: sj.StackDecoder(encoding)))
+
+    def test_instrument(self):
+        sample = '{"a": [1, 2.5, "x\\n", {"b": null, "a": true}], "c": {"d": "v", "a": false}}'
+        decoder = sj.TokenDecoder()
+        seen = []
+        stats = sj.instrument(decoder, callback=seen.append, native=False)
+        self.assertEqual(sj.loads(sample, cls=sj.BasicDecoder), decoder.decode(sample))
+        self.assertEqual([stats], seen)
+        self.assertEqual({'object': 3, 'array': 1, 'key': 6, 'string': 2, 'number': 2, 'null': 1, 'boolean': 2},
+                         stats.tokens)
+        self.assertEqual((len(sample), 3), (stats.bytes, stats.max_depth))
+        self.assertEqual(1, stats.calls['decode'])
+        self.assertIn('decode_string', stats.times)
+        self.assertAlmostEqual(2 / 6, stats.hit_rate('memo'))
+        sj.uninstrument(decoder)
+        self.assertNotIn('decode', decoder.__dict__)
+        self.assertIs(dict, type(decoder.memo))
+        encoder = sj.CustomEncoder()
+        stats = sj.instrument(encoder)
+        encoder.encode([Student('a'), Student('b')])
+        self.assertEqual(0.5, stats.hit_rate('plans'))
+        self.assertEqual(1, stats.calls['compile_plan'])
+        self.assertEqual({'array': 1, 'object': 2, 'key': 8, 'string': 2, 'number': 4, 'boolean': 2}, stats.tokens)
+        self.assertEqual(2, stats.calls['iter_object'])
+        self.assertIn('iter_dict', stats.times)
+        stats = sj.instrument(sj.TokenDecoder)
+        try:
+            self.assertEqual(sj.loads(sample, cls=sj.BasicDecoder), sj.loads(sample, cls=sj.TokenDecoder))
+            self.assertEqual(1, stats.calls['decode'])
+            self.assertEqual(set() if sj._jsonease_speedups is None else {'c_scanner'}, stats.native)
+        finally:
+            sj.uninstrument(sj.TokenDecoder)
+        sj.loads(sample, cls=sj.TokenDecoder)
+        self.assertEqual(1, stats.calls['decode'])
+
+    def test_register(self):
+        class Money(object):
+            def __init__(self, amount):
+                self.amount = amount
+
+        class MoneyEncoder(sj.CustomEncoder):
+            pass
+
+        encoder = sj.CustomEncoder()
+        self.assertEqual('{"amount": "1.50"}', encoder.encode(Money('1.50')))
+        self.assertEqual('1.50', sj.dumps(Decimal('1.50')))
+        MoneyEncoder.register(Money, lambda m: str(m.amount))
+        self.assertEqual('"1.50"', sj.dumps(Money('1.50'), cls=MoneyEncoder))
+        self.assertEqual('{"amount": "1.50"}', encoder.encode(Money('1.50')))
+        try:
+            sj.register(Decimal, float)
+            self.assertEqual('[1.5, {"amount": 2.5}]', encoder.encode([Decimal('1.50'), Money(Decimal('2.5'))]))
+            self.assertEqual('1.5', sj.dumps(Decimal('1.50'), cls=sj.BasicEncoder))
+        finally:
+            sj.unregister(Decimal)
+        self.assertRaises(sj.JsoneaseEncodeError, sj.dumps, Decimal('1.50'), cls=sj.BasicEncoder)
+
+    def test_custom_typed(self):
+        sample = ('[{"name": "a", "born": "2001-02-03", "addresses": [{"city": "x"}, {"city": "y", "zip_code": "1"}], '
+                  '"pairs": {"k": [1, 2], "j": {"x": 5}}, "parent": {"name": "p", "born": "1970-01-01", "addresses": []}}]')
+        people = sj.loads(sample, clazz=List[Person])
+        self.assertEqual(1, len(people))
+        person = people[0]
+        self.assertEqual(date(2001, 2, 3), person.born)
+        self.assertEqual(['x', 'y'], [a.city for a in person.addresses])
+        self.assertTrue(isinstance(person.addresses[1], Address))
+        self.assertEqual({'k': Pair(1, 2), 'j': Pair(5, 0)}, person.pairs)
+        self.assertEqual(Person('p', date(1970, 1, 1), []), person.parent)
+        self.assertRaises(sj.JsoneaseCastError, sj.loads, '{"zip_code": "1"}', clazz=Address)
+
+    def test_custom_var_params(self):
+        class Options(object):
+            def __init__(self, **kwargs):
+                self.kwargs = kwargs
+
+        class Located(object):
+            def __init__(self, address: Address, *tags, **extra):
+                self.address = address
+                self.tags = tags
+                self.extra = extra
+
+        self.assertEqual({'a': 1, 'b': [True]}, sj.loads('{"a": 1, "b": [true]}', clazz=Options).kwargs)
+        self.assertEqual({}, sj.loads('{}', clazz=Options).kwargs)
+        self.assertRaises(sj.JsoneaseCastError, sj.loads, '1', clazz=Options)
+        located = sj.loads('{"address": {"city": "x"}, "n": 2}', clazz=Located)
+        self.assertEqual(('x', {'n': 2}), (located.address.city, located.extra))
+        located = sj.loads('[{"city": "y"}, "a", "b"]', clazz=Located)
+        self.assertEqual(('y', ('a', 'b')), (located.address.city, located.tags))
+        self.assertRaises(sj.JsoneaseCastError, sj.loads, '{"n": 2}', clazz=Located)
+        self.assertRaises(sj.JsoneaseCastError, sj.loads, '{"2017-01-02": 2}', clazz=Options)
+
+    def test_custom_typed_threads(self):
+        sample = '{"name": "a", "born": "2001-02-03", "addresses": [], "parent": {"name": "p", "born": "1970-01-01", "addresses": []}}'
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            for _ in range(50):
+                decoder = sj.CustomDecoder()
+                barrier = threading.Barrier(4)
+                results = []
+
+                def run():
+                    barrier.wait()
+                    try:
+                        results.append(decoder.decode(sample, Person).parent.name)
+                    except RecursionError as e:
+                        results.append(e)
+                threads = [threading.Thread(target=run) for _ in range(4)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                self.assertEqual(['p'] * 4, results)
+        finally:
+            sys.setswitchinterval(interval)
+
+
+class TestStream(TestCase):
+    sample = '{"a": [1, 2.5, "x\\u00e9\\n", {"b": null}], "c": {"d": [true, false, []]}}'
+
+    def test_iterparse(self):
+        events = list(sj.iterparse(self.sample))
+        self.assertEqual(('', 'start_map', None), events[0])
+        self.assertEqual(('a.item', 'string', 'xé\n'), events[5])
+        self.assertEqual(('c.d', 'end_array', None), events[-3])
+        for size in (1, 3, 7):
+            chunked = list(sj.iterparse(BytesIO(self.sample.encode('utf-8')), chunk_size=size))
+            self.assertEqual(events, chunked)
+
+    def test_iter_items(self):
+        self.assertEqual([1, 2.5, 'xé\n', {'b': None}], list(sj.iter_items(self.sample, 'a')))
+        self.assertEqual([True, False, []], list(sj.iter_items(StringIO(self.sample), 'c.d', chunk_size=2)))
+        sample = [{'id': i, 's': 'v\\"%d' % i, 'l': [i, [i]]} for i in range(100)]
+        self.assertEqual(sample, list(sj.iter_items(StringIO(sj.dumps(sample)), chunk_size=5)))
+
+    def test_iterparse_long_token(self):
+        sample = '["%s", %s, "\\u00e9"]' % ('a\\"b' * 2000, '1' * 3000)
+        tokenizer = sj.StreamTokenizer()
+        tokens = []
+        buffers = 0
+        buffer = tokenizer.buffer
+        for i in range(0, len(sample), 3):
+            tokenizer.feed(sample[i: i + 3].encode('utf-8'))
+            tokens.extend(tokenizer)
+            buffers += tokenizer.buffer is not buffer
+            buffer = tokenizer.buffer
+        self.assertLess(buffers, 10)
+        tokenizer.close()
+        tokens.extend(tokenizer)
+        self.assertEqual(['[', 'string', ',', 'number', ',', 'string', ']'], [kind for kind, _, _ in tokens])
+        self.assertEqual(sj.loads(sample), list(sj.iter_items(StringIO(sample), chunk_size=3)))
+
+    def test_iterparse_error(self):
+        with self.assertRaises(sj.JsoneaseDecodeError) as cm:
+            list(sj.iterparse(StringIO('[1,\n 2,\n x]'), chunk_size=2))
+        self.assertEqual(('3', '2'), cm.exception.linecol(cm.exception.s, cm.exception.pos, cm.exception.origin))
+        for s in ('[1, 2', '{"a" 1}', '', '[1] 2', '"abc'):
+            self.assertRaises(sj.JsoneaseDecodeError, list, sj.iterparse(s))
+
+    def test_reformat(self):
+        sample = '  ' + self.sample.replace('[]', '[ \n ]') + '\n'
+        for options in ({}, {'align': 2, 'indent': 2, 'item_sep': ',\n', 'eol': '\n'}):
+            expected = sj.formats(sample, **options)
+            self.assertEqual(expected, sj.StreamFormatter(**options).format(sample))
+            for size in (1, 3, 7):
+                fp = StringIO()
+                sj.reformat(BytesIO(sample.encode('utf-8')), fp, chunk_size=size, **options)
+                self.assertEqual(expected, fp.getvalue())
+        with self.assertRaises(sj.JsoneaseFormatError) as cm:
+            sj.reformat(StringIO('[1,\n 2,\n x]'), StringIO(), chunk_size=2)
+        self.assertEqual(('3', '2'), cm.exception.linecol(cm.exception.s, cm.exception.pos, cm.exception.origin))
+
+    def test_async(self):
+        class Writer(object):
+            def __init__(self):
+                self.data = bytearray()
+                self.drains = 0
+
+            def write(self, data):
+                self.data += data
+
+            async def drain(self):
+                self.drains += 1
+
+        sample = {'s': [Student('é%d' % i) for i in range(300)], 'd': date(2017, 1, 2), 'n': [1.5, None, True]}
+
+        async def run():
+            ticks = []
+
+            async def ticker():
+                while True:
+                    ticks.append(None)
+                    await asyncio.sleep(0)
+
+            task = asyncio.ensure_future(ticker())
+            writer = Writer()
+            await sj.async_dump(sample, writer, chunk_size=256)
+            reader = asyncio.StreamReader()
+            reader.feed_data(bytes(writer.data))
+            reader.feed_eof()
+            obj = await sj.async_load(reader, chunk_size=512)
+            started = len(ticks)
+            reader = asyncio.StreamReader()
+            reader.feed_data(b'{"a": [1,\n 2,\n x]}')
+            reader.feed_eof()
+            with self.assertRaises(sj.JsoneaseDecodeError) as cm:
+                await sj.async_load(reader, chunk_size=4)
+            task.cancel()
+            return writer, obj, started, cm.exception
+
+        writer, obj, ticks, error = asyncio.run(run())
+        self.assertEqual(sj.dumps(sample).encode('utf-8'), bytes(writer.data))
+        self.assertGreater(writer.drains, 10)
+        self.assertGreater(ticks, 20)
+        self.assertEqual(sj.loads(sj.dumps(sample)), obj)
+        self.assertEqual(('3', '2'), error.linecol(error.s, error.pos, error.origin))
+
+    def test_lines(self):
+        sample = [{'id': i, 's': 'v\n%d' % i, 'l': [i, [i]]} for i in range(25)] + [None, 'x', [1.5]]
+        for workers in (None, 2):
+            fp = StringIO()
+            sj.dump_lines(sample, fp, cls=sj.BasicEncoder, workers=workers, batch_size=4)
+            self.assertEqual(len(sample), fp.getvalue().count('\n'))
+            self.assertEqual(sample, list(sj.load_lines(StringIO(fp.getvalue()), workers=workers, batch_size=4)))
+            self.assertEqual(sample, list(sj.load_lines(BytesIO(fp.getvalue().encode('utf-8')), cls=sj.BytesDecoder,
+                                                        workers=workers, batch_size=4)))
+            with self.assertRaises(sj.JsoneaseDecodeError) as cm:
+                list(sj.load_lines(StringIO('{"a": 1}\n\n[1, 2]\n[1, x]\n'), workers=workers, batch_size=2))
+            self.assertEqual(('4', '5'), cm.exception.linecol(cm.exception.s, cm.exception.pos, cm.exception.origin))
+
+    def test_lines_spawn(self):
+        class Upper(sj.StackDecoder):
+            def finish_object(self, obj):
+                return {k.upper(): v for k, v in obj.items()}
+
+        method = multiprocessing.get_start_method()
+        multiprocessing.set_start_method('spawn', force=True)
+        sj.register(Point, lambda p: [p.x, p.y])
+        try:
+            fp = StringIO()
+            sj.dump_lines([Point(i, -i) for i in range(10)], fp, workers=2, batch_size=3)
+            self.assertEqual(''.join('[%d, %d]\n' % (i, -i) for i in range(10)), fp.getvalue())
+            lines = StringIO(''.join('{"a": %d}\n' % i for i in range(10)))
+            self.assertEqual([{'A': i} for i in range(10)], list(sj.load_lines(lines, cls=Upper, workers=2, batch_size=3)))
+            with self.assertRaises(sj.JsoneaseDecodeError) as cm:
+                list(sj.load_lines(StringIO('[1]\n[2]\n[3]\n  {"a" 1}\n'), cls=Upper, workers=2, batch_size=2))
+            self.assertEqual('Can not decode json "object" string: 4 : 3', str(cm.exception))
+        finally:
+            sj.unregister(Point)
+            multiprocessing.set_start_method(method, force=True)
+
+
+class TestSpeedups(TestCase):
+    samples = ['{"a": [1, -2.5e3, 0.1, "x\\n\\u00e9\\ud83d\\ude00\\ud800", {"b": null, "a": true}], "c": {"d": "", "a": false}}',
+               '[{"id": "1d6b5a9e-8a2e-4c8b-9d3e-0c5b3a7f2e11", "at": "2017-01-02T03:04:05", "n": [1, 2.0, 3]}]',
+               '  [ ]  ', '{}', '"\\"\\\\\\/\\b\\f\\n\\r\\t"', '12345678901234567890', '-0', '[[[[[]]]]]']
+    errors = ['', '[', '{"a" 1}', '{"a": 1,}', '[1 2]', '{a: 1}', '[nul]', '[tru]', '"\\x"', '"\\u12"', '-', '01',
+              '[1.]', '"abc', '{"a": [}', '[1] x', '[' * 20000 + ']' * 20000]
+    decoders = [lambda: sj.BasicDecoder(sj.JSON_ENCODING), sj.StackDecoder, sj.TokenDecoder,
+                lambda: sj.TokenDecoder(decimal=True, intern_keys=True), lambda: sj.StackDecoder(numeric_arrays=True),
+                sj.AdvancedDecoder, sj.CustomDecoder]
+    encoders = [lambda: sj.BasicEncoder(sj.JSON_ENCODING), lambda: sj.BasicEncoder(sj.JSON_ENCODING, indent=2),
+                lambda: sj.AdvancedEncoder(item_sep=',', key_sep=':'), sj.CustomEncoder]
+
+    def backends(self, factory, attr):
+        pure = factory()
+        setattr(pure, attr, False)
+        return factory(), pure
+
+    def outcome(self, func, arg):
+        try:
+            return 'ok', func(arg)
+        except (sj.JsoneaseError, RecursionError, IndexError, TypeError) as e:
+            return type(e).__name__, str(e)
+
+    def test_decoder_parity(self):
+        for factory in self.decoders:
+            fast, pure = self.backends(factory, 'c_scanner')
+            for s in self.samples + self.errors:
+                self.assertEqual(self.outcome(pure.decode, s), self.outcome(fast.decode, s))
+            self.assertIs(bool(sj._jsonease_speedups), bool(fast.c_scanner))
+
+    def test_encoder_parity(self):
+        objs = [sj.loads(s) for s in self.samples] + [
+            ['\x00\x1f\x7f', 1e300, -0.0, float('inf'), 2 ** 70, True, None, (1, 2), {'k': {1, 2}}],
+            {'d': date(2017, 1, 2), 'u': uuid.UUID(int=1), 's': Student('a'), 'n': Decimal('1.50')}, [object()]]
+        for factory in self.encoders:
+            fast, pure = self.backends(factory, 'c_encoder')
+            for obj in objs:
+                self.assertEqual(self.outcome(pure.encode, obj), self.outcome(fast.encode, obj))
+
+    def test_hooks(self):
+        class Tagged(sj.StackDecoder):
+            def finish_array(self, obj):
+                return tuple(obj)
+
+            def decode_key_string(self, s, pos):
+                key, end = super(Tagged, self).decode_key_string(s, pos)
+                return key.upper(), end
+
+        self.assertEqual({'A': (1, {'B': []})}, sj.loads('{"a": [1, {"b": []}]}', cls=Tagged))
+        self.assertEqual(array('d', [1.0, 2.5]), sj.TokenDecoder(numeric_arrays=True).decode('[1, 2.5]'))
+        self.assertEqual(date(2017, 1, 2), sj.loads('["2017-01-02"]', cls=sj.AdvancedDecoder)[0])
+        self.assertEqual('a', sj.loads('{"name": "a", "score": 1}', clazz=Student).name)
+        decoder = sj.TokenDecoder()
+        sj.instrument(decoder, native=False)
+        self.assertIs(False, decoder.c_scanner)
+        sj.uninstrument(decoder)
+        self.assertNotIn('c_scanner', decoder.__dict__)
+
+    def test_accelerated(self):
+        for factory in [lambda **kw: sj.BasicDecoder(sj.JSON_ENCODING, **kw), sj.StackDecoder, sj.TokenDecoder,
+                        sj.CustomDecoder]:
+            fast, plain = factory(accelerated=True), factory()
+            for s in self.samples + self.errors + ['[NaN]', '{"a": -Infinity}']:
+                self.assertEqual(self.outcome(plain.decode, s), self.outcome(fast.decode, s))
+        objs = [sj.loads(s) for s in self.samples] + [
+            [float('nan'), 1e300, '\x00\x1f', True, None], [Student('a'), {'s': Student('b'), 'd': date(2017, 1, 2)}],
+            {'n': Decimal('1.50'), 'c': 1 + 2j, 'l': deque([1, 2])}]
+        for kw in [{}, {'item_sep': ',', 'key_sep': ':'}, {'indent': 2}]:
+            fast, plain = sj.CustomEncoder(accelerated=True, **kw), sj.CustomEncoder(**kw)
+            for obj in objs:
+                self.assertEqual(plain.encode(obj), fast.encode(obj))
+        self.assertEqual('{"a": [1, 2.5]}', sj.dumps({'a': [1, 2.5]}, cls=sj.BasicEncoder, accelerated=True))
+        objs = [{1: 2}, {True: 1}, [(1, 2)], {'a': (1,), 'b': [{2: 3}]}, [1, {'a': date(2017, 1, 2)}, (3,)],
+                [uuid.UUID(int=7), {'s': Student('c')}, float('inf')]]
+        for cls in (sj.BasicEncoder, sj.AdvancedEncoder, sj.CustomEncoder):
+            plain = cls(sj.JSON_ENCODING)
+            for fast in self.backends(lambda: cls(sj.JSON_ENCODING, accelerated=True), 'c_encoder'):
+                for obj in objs:
+                    self.assertEqual(self.outcome(plain.encode, obj), self.outcome(fast.encode, obj))
+        self.assertEqual({'a': [1, 2.5]}, sj.loads('{"a": [1, 2.5]}', cls=sj.BasicDecoder, accelerated=True))
+        decoder = sj.TokenDecoder(decimal=True, accelerated=True)
+        self.assertEqual({'a': [1, Decimal('2.5')]}, decoder.decode('{"a": [1, 2.5]}'))